@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+from time import perf_counter
+
+from components.compile_cache import normalize_text
+
+CHECKPOINT_VERSION = 2
+
+def default_checkpoint_dir() -> Path:
+    if os.environ.get("PYPROE_CHECKPOINT_DIR"):
+        return Path(os.environ["PYPROE_CHECKPOINT_DIR"])
+    return Path.home() / ".pyproe" / "checkpoints"
+
+def checkpoint_path(fnc_path: str | None, text: str) -> Path:
+    """
+    problem.fnc -> problem.fnc.ckpt next to it. Formulations that were never saved
+    to a file get one in the checkpoint directory, named after their content.
+    """
+    if fnc_path:
+        return Path(f"{fnc_path}.ckpt")
+    return default_checkpoint_dir() / f"{hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()[:16]}.ckpt"
+
+def checkpoint_key(method: str, text: str, settings: dict) -> str:
+    """
+    Identity of a run: the solver, the formulation and every setting that changes
+    the result. The worker count and the resume flag itself do not.
+    """
+    payload = json.dumps({
+        'version': CHECKPOINT_VERSION,
+        'method': method,
+        'text': normalize_text(text),
+        'settings': {k: v for k, v in settings.items() if k not in ('workers', 'resume')},
+    }, sort_keys=True, default=str)
+
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class Checkpoint:
+    """
+    Pickled solver state for one run, so a long solve can be resumed after the app
+    closes. load() ignores a file written for a different run key. save() keeps the
+    latest state and writes it at most once per interval seconds (atomically);
+    finish() removes the file after a complete run and writes the latest state
+    otherwise (e.g. after Stop).
+
+    A state may be a zero-argument callable, which is only called when the state is
+    actually written.
+    """
+    def __init__(self, path: str | Path, key: str, interval: float=30.0):
+        self.path = Path(path)
+        self.key = key
+        self.interval = interval
+        self.last = perf_counter()
+        self.pending = None
+
+    def load(self) -> dict | None:
+        try:
+            with open(self.path, "rb") as file:
+                record = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return None
+
+        if not isinstance(record, dict) or record.get('key') != self.key:
+            return None
+        return record.get('state')
+
+    def save(self, state, force: bool=False) -> None:
+        self.pending = state
+        if force or perf_counter() - self.last >= self.interval:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.pending is None:
+            return
+
+        state = self.pending() if callable(self.pending) else self.pending
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+            # Write then rename so a crash mid-write keeps the previous checkpoint
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "wb") as file:
+                pickle.dump({'key': self.key, 'state': state}, file)
+            os.replace(tmp, self.path)
+        except (OSError, pickle.PicklingError) as e:
+            print(f"Error: {e} when writing checkpoint {self.path}")
+
+        self.pending = None
+        self.last = perf_counter()
+
+    def finish(self, complete: bool) -> None:
+        if complete:
+            self.clear()
+        else:
+            self.flush()
+
+    def clear(self) -> None:
+        self.pending = None
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
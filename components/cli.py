@@ -0,0 +1,229 @@
+"""
+Headless batch runner for .fnc optimizations. Imports no GUI modules.
+
+    python -m components.cli solve problem.fnc --method nsga2 --settings '{"generations": 500}'
+    python -m components.cli solve problems/ --method multi --set increment=0.05 --jobs 4 --format csv
+
+Settings use the keys of the Optimization page (see components.run.solve). For each
+problem, <name>.<method>.json and/or .csv are written next to it or into --output.
+"""
+import argparse
+import csv
+import json
+import os
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import Event
+from pathlib import Path
+from time import perf_counter
+
+from components.checkpoint import checkpoint_path
+from components.inputfnc2 import InputFile
+from components.optimization_data import Optimization, Opt
+from components.run import METHOD, ProgressReporter, solve
+
+METHODS = {
+    'single':  METHOD.Single,
+    'multi':   METHOD.Multi,
+    'nsga2':   METHOD.NSGAII,
+    'nsga3':   METHOD.NSGAIII,
+    'nbi':     METHOD.NBI,
+    'epsilon': METHOD.Epsilon,
+}
+
+def parse_settings(settings: str | None, overrides: list[str]) -> dict:
+    """
+    --settings is inline JSON or a path to a JSON file; every --set key=value is
+    applied on top, with the value read as JSON when possible (so 0.05, true and
+    "text" all work) and as a plain string otherwise.
+    """
+    parsed = {}
+    if settings:
+        path = Path(settings)
+        parsed = json.loads(path.read_text() if path.is_file() else settings)
+        if not isinstance(parsed, dict):
+            raise ValueError("--settings must be a JSON object.")
+
+    for item in overrides:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"--set expects key=value, got '{item}'.")
+        try:
+            parsed[key.strip()] = json.loads(value)
+        except ValueError:
+            parsed[key.strip()] = value
+
+    return parsed
+
+def collect_problems(paths: list[str]) -> list[Path]:
+    problems = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            problems.extend(sorted(path.glob("*.fnc")))
+        elif path.is_file():
+            problems.append(path)
+        else:
+            raise FileNotFoundError(f"No such file or directory: {path}")
+
+    return problems
+
+def write_results(result: dict, stem: Path, formats: list[str]) -> list[Path]:
+    written = []
+    if 'json' in formats:
+        path = stem.with_name(stem.name + ".json")
+        path.write_text(json.dumps(result, indent=2))
+        written.append(path)
+
+    if 'csv' in formats and result['status'] == 'success':
+        path = stem.with_name(stem.name + ".csv")
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(result['variables'] + result['objectives'])
+            for solution in result['solutions']:
+                writer.writerow([solution['x'][v] for v in result['variables']] + [solution['f'][o] for o in result['objectives']])
+        written.append(path)
+
+    return written
+
+class _StderrProgress:
+    """
+    Stands in for the GUI queue so ProgressReporter can print its events.
+    """
+    def __init__(self, name: str):
+        self.name = name
+
+    def put(self, message):
+        _, event = message
+        status = f"{self.name}: {event['stage']} {event['done']}"
+        if event.get('total'):
+            status += f"/{event['total']}"
+        if event.get('best') is not None:
+            status += f"  best={event['best']:.6g}"
+        if event.get('size') is not None:
+            status += f"  front={event['size']}"
+        if event.get('hypervolume') is not None:
+            status += f"  hv={event['hypervolume']:.6g}"
+        print(status, file=sys.stderr, flush=True)
+
+def solve_file(
+    path: Path,
+    method: METHOD,
+    settings: dict,
+    output: Path | None,
+    formats: list[str],
+    checkpoint: bool=False,
+    verbose: bool=False,
+    stop=None,
+) -> tuple[str, str, list[Path], str]:
+    """
+    Solve one .fnc file and write its results. Returns (file, status, written paths,
+    error), with an empty error on success.
+    """
+    # A file that fails to parse or solve is reported as FAILED; the batch carries on
+    try:
+        file = InputFile(str(path))
+        if file.error:
+            result = Optimization(Opt.FAILED, file.error_message).to_dict()
+        else:
+            progress = ProgressReporter(_StderrProgress(path.name), interval=1.0) if verbose else None
+            ckpt = checkpoint_path(str(path), path.read_text()) if checkpoint else None
+            result = solve(method, file, settings, progress, stop, ckpt).to_dict()
+    except Exception as e:
+        result = Optimization(Opt.FAILED, f"{type(e).__name__}: {e}").to_dict()
+
+    result = {'file': str(path), 'method': method.name, 'settings': settings, **result}
+    stem = (output or path.parent) / f"{path.stem}.{method.name.lower()}"
+    return str(path), result['status'], write_results(result, stem, formats), result.get('error', "")
+
+_worker_stop = None
+
+def _init_worker(stop):
+    global _worker_stop
+    _worker_stop = stop
+    # Ctrl-C is handled by the parent, which asks every job to stop through the event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _solve_file_worker(*args) -> tuple[str, str, list[Path], str]:
+    return solve_file(*args, stop=_worker_stop)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m components.cli", description="Run .fnc optimizations without the GUI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("solve", help="Solve one or more .fnc files (directories are expanded to their .fnc files).")
+    run.add_argument("paths", nargs="+", help=".fnc files or directories of .fnc files")
+    run.add_argument("--method", "-m", choices=METHODS, default="single")
+    run.add_argument("--settings", "-s", help="solver settings as a JSON object or a path to a JSON file")
+    run.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE", help="override a single setting (repeatable)")
+    run.add_argument("--output", "-o", type=Path, help="directory for the results (default: next to each .fnc)")
+    run.add_argument("--format", "-f", choices=["json", "csv", "both"], default="json")
+    run.add_argument("--jobs", "-j", type=int, default=1, help="number of files solved in parallel (0 for every core)")
+    run.add_argument("--checkpoint", action="store_true", help="save a checkpoint next to each .fnc while solving")
+    run.add_argument("--resume", action="store_true", help="continue from matching checkpoints (implies --checkpoint)")
+    run.add_argument("--verbose", "-v", action="store_true", help="print progress to stderr")
+
+    return parser
+
+def main(argv: list[str]=None) -> int:
+    args = build_parser().parse_args(argv)
+
+    try:
+        settings = parse_settings(args.settings, args.overrides)
+        problems = collect_problems(args.paths)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    if not problems:
+        print("Error: no .fnc files found.", file=sys.stderr)
+        return 2
+
+    if args.jobs < 0:
+        print("Error: --jobs must be 0 or more.", file=sys.stderr)
+        return 2
+
+    if args.resume:
+        settings['resume'] = True
+    if args.output:
+        args.output.mkdir(parents=True, exist_ok=True)
+
+    method  = METHODS[args.method]
+    formats = ["json", "csv"] if args.format == "both" else [args.format]
+    jobs    = min(args.jobs or os.cpu_count() or 1, len(problems))
+    common  = (method, settings, args.output, formats, args.checkpoint or args.resume, args.verbose and jobs == 1)
+
+    # The first Ctrl-C lets running solves finish with partial results; the second aborts
+    stop = Event()
+    def interrupt(signum, frame):
+        print("Stopping... (Ctrl-C again to abort)", file=sys.stderr, flush=True)
+        stop.set()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGINT, interrupt)
+
+    start  = perf_counter()
+    failed = 0
+    def report(path: str, status: str, written: list[Path], error: str):
+        nonlocal failed
+        failed += status != 'success'
+        print(f"{status.upper():8} {path} -> {', '.join(map(str, written)) or '-'}", flush=True)
+        # CSV output has no room for it, so a failure's reason is always printed
+        if error:
+            print(f"         {error}", flush=True)
+
+    if jobs <= 1:
+        for path in problems:
+            if stop.is_set():
+                break
+            report(*solve_file(path, *common, stop=stop))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(stop,)) as pool:
+            futures = [pool.submit(_solve_file_worker, path, *common) for path in problems]
+            for future in as_completed(futures):
+                report(*future.result())
+
+    print(f"{len(problems) - failed}/{len(problems)} solved in {perf_counter() - start:.2f}s", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
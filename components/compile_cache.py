@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import re
+from functools import cache
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+CACHE_VERSION = 1
+
+def default_cache_dir() -> Path:
+    if os.environ.get("PYPROE_CACHE_DIR"):
+        return Path(os.environ["PYPROE_CACHE_DIR"])
+    return Path.home() / ".pyproe" / "compile-cache"
+
+@cache
+def sympy_version() -> str:
+    # Read from the package metadata so building a key does not import sympy;
+    # frozen builds may not ship the metadata
+    try:
+        return version("sympy")
+    except PackageNotFoundError:
+        import sympy
+        return sympy.__version__
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+def make_key(text: str, variables: list[str], constants: dict=None, dependencies: list[str]=None) -> str:
+    """
+    Content address of a compiled Function: the normalized expression text, the
+    variable list, the constant values and the keys of any registry functions the
+    text refers to (so editing F1 invalidates O1 = F1).
+    """
+    payload = json.dumps({
+        'version': CACHE_VERSION,
+        'sympy': sympy_version(),
+        'text': normalize_text(text),
+        'variables': [str(v).lower() for v in variables],
+        'constants': sorted((str(k).lower(), repr(v)) for k, v in (constants or {}).items()),
+        'dependencies': sorted(dependencies or []),
+    }, sort_keys=True)
+
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class CompileCache:
+    """
+    Size-bounded on-disk store of compiled Function entries (JSON, one file per key).
+    Reads refresh a file's mtime; once the directory exceeds max_bytes the least
+    recently used entries are removed.
+    """
+    def __init__(self, directory: Path=None, max_bytes: int=256 * 1024 * 1024, enabled: bool=True):
+        self.directory = Path(directory) if directory else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.enabled = enabled and not os.environ.get("PYPROE_NO_CACHE")
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> dict | None:
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                entry = json.load(file)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        return entry
+
+    def put(self, key: str, entry: dict) -> None:
+        if not self.enabled:
+            return
+
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+            # Write then rename so a concurrent reader never sees half a file
+            tmp = self._path(key).with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as file:
+                json.dump(entry, file)
+            os.replace(tmp, self._path(key))
+
+            self.evict()
+        except OSError:
+            # Caching is best-effort; a read-only or full disk just means recompiling
+            pass
+
+    def evict(self) -> None:
+        files = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        for path in self.directory.glob("*.json"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+COMPILE_CACHE = CompileCache()
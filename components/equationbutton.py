@@ -67,7 +67,8 @@ class EquationButton(PushButton):
         self.clicked.connect(self.open_editor)
 
     def set_display_text(self):
-        self.setToolTip(self.equation_text)
+        # Model definitions (e.g. rbf(...)) carry their data inline, so long text is clamped here too
+        self.setToolTip(clamp_text(self.equation_text, 2000))
         t = self.equation_text.replace("\n", "").strip()
         if t:
             self.display_text = clamp_text(t, self.clamp_factor)
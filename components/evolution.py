@@ -0,0 +1,74 @@
+from components.inputfnc2 import InputFile
+from components.optimize import evaluate_population, evaluate_population_worker, is_stopped
+
+from pymoo.core.problem import Problem
+from pymoo.core.callback import Callback
+
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+class BatchProblem(Problem):
+    """
+    pymoo problem evaluating the whole population matrix per generation with
+    Function.eval_batch, one numpy pass per objective/constraint. Given a pool
+    (initialized with _init_worker) the rows are split across its workers instead;
+    every row is still evaluated by the same kernels, so results are identical.
+    """
+    def __init__(self, input: InputFile, pool: ProcessPoolExecutor=None, workers: int=1, **kwargs):
+        self.input = input
+        self.pool = pool
+        self.workers = workers
+
+        super().__init__(
+            n_var=len(input.variables),
+            n_obj=len(input.objectives),
+            n_ieq_constr=len(input.inequality_constraints),
+            n_eq_constr=len(input.equality_constraints),
+            xl=[var.min for var in input.variables],
+            xu=[var.max for var in input.variables],
+            **kwargs,
+        )
+
+    def _evaluate(self, X, out, *args, **kwargs):
+        if self.pool is None or self.workers <= 1 or len(X) < 2:
+            values = evaluate_population(self.input, X)
+        else:
+            parts = list(self.pool.map(evaluate_population_worker, np.array_split(X, min(self.workers, len(X)))))
+            values = {key: np.vstack([part[key] for part in parts]) for key in ("F", "G", "H")}
+
+        out["F"] = values["F"]
+        if self.n_ieq_constr:
+            out["G"] = values["G"]
+        if self.n_eq_constr:
+            out["H"] = values["H"]
+
+    def __getstate__(self):
+        # The pool only lives in the process that created it
+        state = self.__dict__.copy()
+        state["pool"] = None
+        return state
+
+class GenerationCallback(Callback):
+    """
+    Per-generation hook for evolve: reports progress and ends the run once stop is
+    set. Neither is pickled with a checkpointed algorithm; they are reattached on
+    resume.
+    """
+    def __init__(self, generations: int, progress: callable=None, stop=None):
+        super().__init__()
+        self.generations = generations
+        self.progress = progress
+        self.stop = stop
+
+    def notify(self, algorithm):
+        if self.progress:
+            self.progress({'stage': 'generation', 'done': algorithm.n_gen, 'total': self.generations, 'front': lambda: algorithm.opt.get("F")})
+        if is_stopped(self.stop):
+            # Update right away so the run ends after this generation, not the next
+            algorithm.termination.terminate()
+            algorithm.termination.update(algorithm)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['progress'] = state['stop'] = None
+        return state
@@ -1,31 +1,46 @@
 from __future__ import annotations
 
 import re as regex
+import builtins
+import inspect
 import numpy as np
 
-from sympy.parsing.sympy_parser import parse_expr, standard_transformations, implicit_multiplication_application
-from sympy import (
-    sin, cos, tan, cot, sec, csc,
-    asin, acos, atan,
-    sinh, cosh, tanh, asinh, acosh, atanh,
-    exp, log, ln,
-    sqrt, Abs, pi,
-    Sum, symbols, sympify, lambdify,
-    diff, im, Derivative, re, sign, E, N, Max, Symbol
-)
-
-locals = {
-    'sin': sin, 'cos': cos, 'tan': tan,
-    'cot': cot, 'sec': sec, 'csc': csc,
-    'asin': asin, 'acos': acos, 'atan': atan,
-    'sinh': sinh, 'cosh': cosh, 'tanh': tanh,
-    'asinh': asinh, 'acosh': acosh, 'atanh': atanh,
-    'exp': exp, 'log': log, 'ln': ln,
-    'sqrt': sqrt, 'abs': Abs,
-    'sum': Sum, 'pi': pi,
-    'im': im, 'Derivative': Derivative, 're': re,
-    'sign': sign, 'e': E, 'max': Max, 'min': min
-}
+from components.compile_cache import COMPILE_CACHE, make_key
+
+# sympy is imported on first use: a Function found in the compile cache never
+# needs it, and importing it is a large share of the application start-up time
+_sympy_locals = None
+
+def sympy_locals() -> dict:
+    """
+    Names available to parsed expressions (shared and extended with the registry
+    functions a compiled expression refers to).
+    """
+    global _sympy_locals
+    if _sympy_locals is None:
+        from sympy import (
+            sin, cos, tan, cot, sec, csc,
+            asin, acos, atan,
+            sinh, cosh, tanh, asinh, acosh, atanh,
+            exp, log, ln,
+            sqrt, Abs, pi,
+            Sum, im, Derivative, re, sign, E, Max
+        )
+
+        _sympy_locals = {
+            'sin': sin, 'cos': cos, 'tan': tan,
+            'cot': cot, 'sec': sec, 'csc': csc,
+            'asin': asin, 'acos': acos, 'atan': atan,
+            'sinh': sinh, 'cosh': cosh, 'tanh': tanh,
+            'asinh': asinh, 'acosh': acosh, 'atanh': atanh,
+            'exp': exp, 'log': log, 'ln': ln,
+            'sqrt': sqrt, 'abs': Abs,
+            'sum': Sum, 'pi': pi,
+            'im': im, 'Derivative': Derivative, 're': re,
+            'sign': sign, 'e': E, 'max': Max, 'min': min
+        }
+
+    return _sympy_locals
 
 def _validate_symbols(expr, variables, constants):
     allowed = set(v.lower() for v in variables)
@@ -49,6 +64,7 @@ def replace_isum(match: regex.Match):
         def replace_indexed(m):
             base = m.group(1)                   # e.g., 'x'
             index_expr = m.group(2)             # e.g., 'i+1'
+            from sympy import sympify
             value = sympify(index_expr, locals={var: i})
             return f"{base}{int(value)}"
 
@@ -65,6 +81,8 @@ def prepare_function(func_str: str):
     return regex.sub(pattern, replace_isum, func_str, flags=regex.IGNORECASE)
 
 def get_expr(func_str: str, vars: list, constants: dict = None):
+    from sympy import symbols, sympify
+
     x_vars = symbols(' '.join(vars), real=True, seq=True)
 
     # Build a locals dictionary that includes all valid variable names
@@ -74,7 +92,7 @@ def get_expr(func_str: str, vars: list, constants: dict = None):
         local_dict.update(constants)
     
     # Add functions explicitly used in math
-    local_dict.update(locals)
+    local_dict.update(sympy_locals())
 
     try:
         expr = sympify(prepare_function(func_str).lower(), locals=local_dict)
@@ -99,6 +117,9 @@ class Constant:
         self.expr = None
         self.value = None
 
+        from sympy import N
+        from sympy.parsing.sympy_parser import parse_expr, standard_transformations, implicit_multiplication_application
+
         # Allow implicit multiplication (e.g., 2pi)
         transformations = (standard_transformations + (implicit_multiplication_application,))
 
@@ -180,16 +201,63 @@ class Node:
             result += repr(child)
         return result
 
-def get_fast_func(expr, variables):
-    # Only keep variables that appear in the expression
-    used_vars = [v for v in variables if v in expr.free_symbols]
+KERNEL_NAMESPACE = "import numpy; from numpy import *; from numpy.linalg import *; from functools import reduce"
+
+def get_kernel_source(used_vars, exprs, cse: bool=False) -> str:
+    # Python source of the numpy code lambdify generates, so it can be stored and re-executed without sympy
+    from sympy import lambdify
+    return inspect.getsource(lambdify(used_vars, exprs, modules='numpy', cse=cse))
+
+def load_kernel(source: str, extra: dict=None) -> callable:
+    namespace = {}
+    exec(KERNEL_NAMESPACE, namespace)
+    # Callables for the native models (e.g. RBFModel) the expression calls by name
+    namespace.update(extra or {})
+    exec(source, namespace)
+    kernel = namespace['_lambdifygenerated']
+
+    missing = [n for n in kernel.__code__.co_names if n not in namespace and not hasattr(builtins, n)]
+    if missing:
+        raise NameError(f"Compiled kernel references unknown name(s): {', '.join(missing)}")
 
-    fast_func = lambdify(used_vars, expr, modules='numpy')
+    return kernel
 
+def get_fast_func(kernel: callable, used_idx: list[int]):
     def wrapper(vals: list[float]):
         # Filter the values down to only those used
-        filtered_vals = [val for var, val in zip(variables, vals) if var in used_vars]
-        return fast_func(*filtered_vals)
+        return kernel(*[vals[i] for i in used_idx])
+
+    return wrapper
+
+def get_batch_func(kernel: callable, used_idx: list[int]):
+    # Same as get_fast_func, but evaluates a whole [n, d] array of points at once
+    def wrapper(X: np.ndarray):
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        result = kernel(*[X[:, i] for i in used_idx])
+
+        # Constant expressions (or ones independent of every column) come back as scalars
+        return np.broadcast_to(np.asarray(result, dtype=float), (X.shape[0],))
+
+    return wrapper
+
+def get_value_and_grad_func(fused_kernel: callable, used_idx: list[int]):
+    # One kernel for the value and every partial derivative, sharing
+    # common subexpressions between them
+    def wrapper(vals: list[float]):
+        value, *grad = fused_kernel(*[vals[i] for i in used_idx])
+        return value, np.array(grad, dtype=float)
+
+    return wrapper
+
+def get_gradient_batch_func(fused_kernel: callable, used_idx: list[int]):
+    def wrapper(X: np.ndarray):
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        _, *grad = fused_kernel(*[X[:, i] for i in used_idx])
+
+        ret = np.empty(X.shape, dtype=float)
+        for i, g in enumerate(grad):
+            ret[:, i] = g
+        return ret
 
     return wrapper
 
@@ -202,33 +270,158 @@ class Function:
         self.name = name.lower()
         self.text = function.lower()
         self.constants = constants or {}
+        self.variable_names = sorted(v.lower() for v in variables)
+        self._variables = None
 
-        locals.update({fname: f.expr for fname, f in Function.registry.items()})
+        self._expr = None
+        self._gradient_exprs = None
 
-        # Detect variable names using sympy
-        self.expr = get_expr(function, [v.lower() for v in variables], constants=self.constants)
-        _validate_symbols(self.expr, variables, self.constants)
-        if self.constants:
-            self.expr = self.expr.subs(self.constants)
-        self.variables = sorted(symbols(' '.join([v.lower() for v in variables]), real=True, seq=True), key=lambda s: str(s))
+        # Functions from the registry referenced by this one are part of its identity
+        referenced = {
+            fname: f for fname, f in Function.registry.items()
+            if regex.search(r'\b' + regex.escape(fname) + r'\b', self.text, flags=regex.IGNORECASE)
+        }
 
-        # Create fast evaluation function
-        self.fast_func = get_fast_func(self.expr, self.variables)
-        
-        # Gradients
-        self.gradient_exprs = [diff(self.expr, v) for v in self.variables]
-        self.gradient_funcs = [get_fast_func(grad, self.variables) for grad in self.gradient_exprs]
+        # Native models called by the expression, directly or through other functions
+        self.models = {}
+        for f in referenced.values():
+            self.models.update(f.models)
+        self.cache_key = make_key(prepare_function(self.text), self.variable_names, self.constants, [f.cache_key for f in referenced.values()])
+
+        entry = COMPILE_CACHE.get(self.cache_key)
+        try:
+            kernels = self._load(entry) if entry else None
+        except Exception:
+            kernels = None
+
+        if kernels is None:
+            entry = self._compile(function, variables, referenced)
+            kernels = self._load(entry)
+            COMPILE_CACHE.put(self.cache_key, entry)
+
+        self._bind(entry, kernels)
 
         if name != "":
             Function.registry[name] = self
 
+    def _bind(self, entry: dict, kernels: tuple[callable, callable]) -> None:
+        self._entry = entry
+        self.used_idx = entry['used']
+        self._expr_srepr = entry['expr']
+        self._gradient_srepr = entry['gradients']
+
+        value_kernel, fused_kernel = kernels
+
+        # Create fast evaluation function
+        self.fast_func = get_fast_func(value_kernel, self.used_idx)
+
+        # Gradients
+        self.value_and_grad_func = get_value_and_grad_func(fused_kernel, self.used_idx)
+
+        # Batched versions for evaluating many points in one numpy pass
+        self.batch_func = get_batch_func(value_kernel, self.used_idx)
+        self.gradient_batch_func = get_gradient_batch_func(fused_kernel, self.used_idx)
+
+    def __getstate__(self) -> dict:
+        # Ship the generated numpy source, not closures or sympy objects; the
+        # receiving process rebuilds the kernels without any symbolic work
+        return {
+            'name': self.name,
+            'text': self.text,
+            'constants': self.constants,
+            'variables': self.variable_names,
+            'cache_key': self.cache_key,
+            'entry': self._entry,
+            'models': self.models,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.name = state['name']
+        self.text = state['text']
+        self.constants = state['constants']
+        self.variable_names = state['variables']
+        self._variables = None
+        self.cache_key = state['cache_key']
+        self.models = state.get('models', {})
+        self._expr = None
+        self._gradient_exprs = None
+        self._bind(state['entry'], self._load(state['entry']))
+
+    def _compile(self, function: str, variables: list[str], referenced: dict) -> dict:
+        """
+        Symbolic work: parse, substitute constants, differentiate and generate numpy source.
+        """
+        from sympy import diff, srepr
+
+        sympy_locals().update({fname: f.expr for fname, f in referenced.items()})
+
+        # Detect variable names using sympy
+        expr = get_expr(function, [v.lower() for v in variables], constants=self.constants)
+        _validate_symbols(expr, variables, self.constants)
+        if self.constants:
+            expr = expr.subs(self.constants)
+
+        gradient_exprs = [diff(expr, v) for v in self.variables]
+
+        self._expr = expr
+        self._gradient_exprs = gradient_exprs
+
+        # Only keep variables that appear in the expression
+        used_idx = [i for i, v in enumerate(self.variables) if v in expr.free_symbols]
+        used_vars = [self.variables[i] for i in used_idx]
+
+        return {
+            'expr': srepr(expr),
+            'gradients': [srepr(g) for g in gradient_exprs],
+            'used': used_idx,
+            'value_source': get_kernel_source(used_vars, expr),
+            'fused_source': get_kernel_source(used_vars, [expr, *gradient_exprs], cse=True),
+        }
+
+    def _load(self, entry: dict) -> tuple[callable, callable]:
+        extra = {}
+        for model in self.models.values():
+            extra.update(model.kernel_namespace())
+
+        return load_kernel(entry['value_source'], extra), load_kernel(entry['fused_source'], extra)
+
+    def _bind_models(self, expr):
+        # A cached srepr only knows model calls as undefined functions; give them back
+        # their derivatives so the expression can be differentiated again
+        for model in self.models.values():
+            expr = model.bind(expr)
+        return expr
+
+    @property
+    def variables(self) -> list:
+        # sympy Symbols in alphabetical order, created only when something symbolic needs them
+        if self._variables is None:
+            from sympy import symbols
+            self._variables = list(symbols(' '.join(self.variable_names), real=True, seq=True))
+        return self._variables
+
+    @property
+    def expr(self):
+        # Rebuilt from the cached srepr only when something symbolic needs it
+        if self._expr is None:
+            from sympy import sympify
+            self._expr = self._bind_models(sympify(self._expr_srepr))
+        return self._expr
+
+    @property
+    def gradient_exprs(self):
+        if self._gradient_exprs is None:
+            from sympy import sympify
+            self._gradient_exprs = [self._bind_models(sympify(g)) for g in self._gradient_srepr]
+        return self._gradient_exprs
+
     def eval(self, vals: list[float]) -> float:
         """
         Evaluate numerically using numpy-lambdified function.
         The list must contain all required variable names in alphabetical order (of variables).
         """
-        if len(vals) != len(self.variables):
-            raise ValueError(f"Not enough variables when evaluating function {self.name}. Have {len(vals)} expect {len(self.variables)}.")
+        if len(vals) != len(self.variable_names):
+            raise ValueError(f"Not enough variables when evaluating function {self.name}. Have {len(vals)} expect {len(self.variable_names)}.")
         
         return self.fast_func(vals)
     
@@ -240,7 +433,82 @@ class Function:
         return self.eval(vals=vals)
     
     def jacobian(self, vals: list[float]) -> np.ndarray:
-        return np.array([f(vals) for f in self.gradient_funcs], dtype=float)
+        return self.value_and_grad(vals)[1]
+
+    def value_and_grad(self, vals: list[float]) -> tuple[float, np.ndarray]:
+        """
+        Evaluate the function and its full gradient in a single fused call.
+        Suitable for scipy's minimize with jac=True.
+        """
+        if len(vals) != len(self.variable_names):
+            raise ValueError(f"Not enough variables when evaluating function {self.name}. Have {len(vals)} expect {len(self.variable_names)}.")
+
+        return self.value_and_grad_func(vals)
+
+    def cached_value_and_grad(self) -> tuple[callable, callable]:
+        """
+        Split value_and_grad into separate (fun, jac) callables that share the
+        result of the last point evaluated, for APIs that ask for them apart
+        (e.g. scipy's NonlinearConstraint).
+        """
+        cache = {'x': None, 'value': None, 'grad': None}
+
+        def update(vals):
+            x = np.asarray(vals, dtype=float)
+            if cache['x'] is None or not np.array_equal(cache['x'], x):
+                cache['value'], cache['grad'] = self.value_and_grad(x)
+                cache['x'] = x.copy()
+
+        def fun(vals):
+            update(vals)
+            return cache['value']
+
+        def jac(vals):
+            update(vals)
+            return cache['grad']
+
+        return fun, jac
+
+    def eval_batch(self, X: np.ndarray) -> np.ndarray:
+        """
+        Evaluate at every row of X (shape [n, d]) in one vectorized call.
+        Columns must follow the same alphabetical variable order as eval. Returns shape [n].
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        if X.shape[1] != len(self.variable_names):
+            raise ValueError(f"Not enough variables when evaluating function {self.name}. Have {X.shape[1]} expect {len(self.variable_names)}.")
+
+        return np.array(self.batch_func(X), dtype=float)
+
+    def jacobian_batch(self, X: np.ndarray) -> np.ndarray:
+        """
+        Gradient at every row of X (shape [n, d]). Returns shape [n, d].
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        if X.shape[1] != len(self.variable_names):
+            raise ValueError(f"Not enough variables when evaluating function {self.name}. Have {X.shape[1]} expect {len(self.variable_names)}.")
+
+        return self.gradient_batch_func(X)
 
     def __repr__(self):
         return f"{self.name.upper()} = {self.text.upper()}"
+
+MODEL_PATTERN = regex.compile(r"^\s*rbf\s*\(", flags=regex.IGNORECASE)
+
+def make_function(name: str, function: str, variables: list[str], constants: dict=None) -> Function:
+    """
+    Function for one formulation entry. A model definition (rbf(...), see
+    components.rbf.RBFModel) becomes the model itself and an entry that only names
+    a model becomes a renamed copy of it, so neither goes through sympy.
+    """
+    from components.rbf import RBFModel
+
+    if MODEL_PATTERN.match(function):
+        return RBFModel.from_text(name, function, variables)
+
+    target = function.strip().lower()
+    for fname, f in Function.registry.items():
+        if fname.lower() == target and isinstance(f, RBFModel):
+            return f.renamed(name, variables)
+
+    return Function(name, function, variables, constants)
@@ -3,7 +3,7 @@ from PySide6.QtCore import Qt
 
 from components.equationbutton import EquationButton
 from components.flipequality import FlipEquality
-from components.fnc_objects import Variable, Function
+from components.fnc_objects import Variable, Function, make_function
 
 from qfluentwidgets import LineEdit, EditableComboBox, SubtitleLabel, ToolButton, FluentIcon as FI
 
@@ -172,4 +172,4 @@ class FunctionItem(DefaultItem):
         self.add_btns()
     
     def get_function_object(self, variables: list[Variable]) -> Function:
-        return Function(self.name_box.text(), self.value_box.equation_text, [var.symbol for var in variables])
+        return make_function(self.name_box.text(), self.value_box.equation_text, [var.symbol for var in variables])
@@ -1,37 +1,38 @@
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QStackedWidget, QHBoxLayout, QDialog, QLabel
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFontDatabase
-from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
-from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
 
 from qfluentwidgets import TextEdit, PushButton, Theme, theme
 
 
-class MplWidget(FigureCanvasQTAgg):
-    def __init__(self, parent=None, width=5, height=4, dpi=100, nav=False):
-        self.fig = Figure(figsize=(width, height), dpi=dpi)
-        self.axes = self.fig.add_subplot(111)
-        self.points = []
-        super().__init__(self.fig)
+class GraphSlot(QWidget):
+    """
+    Placeholder for an MplWidget, which is only built (importing matplotlib) when
+    the slot is first shown or its graph is used, so start-up never loads matplotlib.
+    """
+    def __init__(self, parent=None, **kwargs):
+        super().__init__(parent)
+        self.kwargs = kwargs
+        self._graph = None
 
-    def plot(self, points):
-        if points is None or len(points[0]) <= 1: return
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
 
-        self.points = points
-        self.axes.scatter(*[points[:, i] for i in range(len(points[0]))])
+    @property
+    def built(self) -> bool:
+        return self._graph is not None
 
-    def clear(self):
-        self.points = []
-        self.axes.clear()
-        self.draw_idle()
-    
-    def delete_fig(self):
-        plt.close(self.fig)
-    
-    def __del__(self):
-        self.delete_fig()
+    @property
+    def graph(self):
+        if self._graph is None:
+            from components.mplwidget import MplWidget
+            self._graph = MplWidget(**self.kwargs)
+            self.layout().addWidget(self._graph)
+        return self._graph
+
+    def showEvent(self, event):
+        self.graph  # builds the canvas on first show
+        super().showEvent(event)
 
 class ToggleWidget(QWidget):
     def __init__(self, parent=None):
@@ -45,10 +46,10 @@ class ToggleWidget(QWidget):
         font = QFontDatabase.systemFont(QFontDatabase.FixedFont)
         self.text_edit.setFont(font)
 
-        self.graph = MplWidget()
+        self.graph_slot = GraphSlot()
 
-        self.stack.addWidget(self.text_edit)  # index 0
-        self.stack.addWidget(self.graph)      # index 1
+        self.stack.addWidget(self.text_edit)   # index 0
+        self.stack.addWidget(self.graph_slot)  # index 1
 
         self.btns = QHBoxLayout()
 
@@ -73,6 +74,10 @@ class ToggleWidget(QWidget):
 
         self.stack.setCurrentIndex(0)
 
+    @property
+    def graph(self):
+        return self.graph_slot.graph
+
     def toggle_view(self):
         current = self.stack.currentIndex()
         self.stack.setCurrentIndex(1 if current == 0 else 0)
@@ -107,6 +112,9 @@ class ToggleWidget(QWidget):
         dialog.exec()
 
     def show_graph_popup(self):
+        from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+        from components.mplwidget import MplWidget
+
         dialog = QDialog()
         dialog.setWindowTitle("Optimization Results Graph")
         dialog.resize(1200, 800)
@@ -145,4 +153,5 @@ class ToggleWidget(QWidget):
     
     def clear(self):
         self.text_edit.clear()
-        self.graph.clear()
+        if self.graph_slot.built:
+            self.graph.clear()
@@ -5,7 +5,6 @@ from PySide6.QtCore import QSize, Qt
 from qfluentwidgets import TextBrowser, MessageBoxBase, TreeWidget
 from fixpath import app_root
 from pathlib import Path
-import resources_rc
 
 
 DOC_MAP = {
@@ -45,6 +44,9 @@ class DocumentationPopup(MessageBoxBase):
 
         self.md = TextBrowser()
 
+        # Images are plain files next to the docs (docs/imgs), read only when a page shows them
+        self.md.setSearchPaths([(app_root() / "docs").as_posix()])
+
         font = QFont()
         font.setPointSize(14)
         self.md.setFont(font)
@@ -1,9 +1,10 @@
-from scipy.stats import qmc
 from numpy import ndarray
 from components.fnc_objects import Variable
 
-def lhs(variables: list[Variable], samples: int) -> ndarray:
-    sampler = qmc.LatinHypercube(len(variables))
+def lhs(variables: list[Variable], samples: int, seed: int | None=None) -> ndarray:
+    from scipy.stats import qmc
+
+    sampler = qmc.LatinHypercube(len(variables), seed=seed)
     sample = sampler.random(n=samples)
 
     return qmc.scale(sample, l_bounds=[var.min for var in variables], u_bounds=[var.max for var in variables])
@@ -1,9 +1,14 @@
-from components.fnc_objects import Variable, Constant, Function, BasicFunction, Node
-from scipy.optimize import NonlinearConstraint
+from __future__ import annotations
+
+from components.fnc_objects import Variable, Constant, Function, BasicFunction, Node, make_function
+from typing import TYPE_CHECKING
 
 import numpy as np
 from pprint import pprint as pp
 
+if TYPE_CHECKING:
+    from scipy.optimize import NonlinearConstraint
+
 SECTIONS = ["VARIABLE", "CONSTANT", "OBJECTIVE", "EQUALITY-CONSTRAINT", "INEQUALITY-CONSTRAINT", "FUNCTION", "GRADIENT"]
 
 def clean_data(lines: list[str]):
@@ -194,7 +199,7 @@ class InputFile:
         for func in sorted(basic_funcs, key=lambda x: x.level):
             for function_type, array in zip(['fun', 'obj', 'eqc', 'iqc'], [self.functions, self.objectives, self.equality_constraints, self.inequality_constraints]):
                 if func.name.lower() in function_type_dict[function_type]:
-                    array.append(Function(func.name.lower(), func.text, [var.symbol for var in self.variables], function_constants))
+                    array.append(make_function(func.name.lower(), func.text, [var.symbol for var in self.variables], function_constants))
 
         if len(self.functions) == 0:
             self.error = True
@@ -210,27 +215,33 @@ class InputFile:
         return [np.array([v.min, v.max]) for v in self.variables]
     
     def get_equality_constraints(self) -> list[NonlinearConstraint]:
+        from scipy.optimize import NonlinearConstraint
+
         ret: list[NonlinearConstraint] = []
         
         for eq in self.equality_constraints:
+            fun, jac = eq.cached_value_and_grad()
             ret.append(NonlinearConstraint(
-                eq,
+                fun,
                 0,
                 0,
-                jac=eq.jacobian,
+                jac=jac,
             ))
 
         return ret
     
     def get_inequality_constraints(self) -> list[NonlinearConstraint]:
+        from scipy.optimize import NonlinearConstraint
+
         ret: list[NonlinearConstraint] = []
 
         for ineq in self.inequality_constraints:
+            fun, jac = ineq.cached_value_and_grad()
             ret.append(NonlinearConstraint(
-                ineq,
+                fun,
                 -np.inf,
                 0,
-                jac=ineq.jacobian,
+                jac=jac,
             ))
 
         return ret
@@ -0,0 +1,50 @@
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
+from matplotlib.figure import Figure
+import sys
+
+
+class MplWidget(FigureCanvasQTAgg):
+    def __init__(self, parent=None, width=5, height=4, dpi=100, nav=False):
+        self.fig = Figure(figsize=(width, height), dpi=dpi)
+        self.axes = self.fig.add_subplot(111)
+        self.points = []
+        self.partial = None
+        super().__init__(self.fig)
+
+    def plot(self, points):
+        self.remove_partial()
+        if points is None or len(points[0]) <= 1: return
+
+        self.points = points
+        self.axes.scatter(*[points[:, i] for i in range(len(points[0]))])
+
+    def plot_partial(self, points):
+        """
+        Show an in-progress front, replacing the previous one and leaving finished
+        results on the axes untouched.
+        """
+        self.remove_partial()
+        if points is None or len(points) == 0 or len(points[0]) <= 1: return
+
+        self.partial = self.axes.scatter(points[:, 0], points[:, 1], c="gray", marker=".")
+        self.draw_idle()
+
+    def remove_partial(self):
+        if self.partial is not None:
+            self.partial.remove()
+            self.partial = None
+
+    def clear(self):
+        self.points = []
+        self.partial = None
+        self.axes.clear()
+        self.draw_idle()
+    
+    def delete_fig(self):
+        # The figure is not created through pyplot, so pyplot is not imported just to close it
+        plt = sys.modules.get("matplotlib.pyplot")
+        if plt is not None:
+            plt.close(self.fig)
+    
+    def __del__(self):
+        self.delete_fig()
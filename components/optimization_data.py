@@ -13,13 +13,13 @@ class Optimization:
         self.data: dict = None
         self.fnc: InputFile = fnc
         
-        if not status:
+        if status == Opt.FAILED:
             self.error_message = data
         else:
             self.data = data
     
     def __repr__(self):
-        if not self.status:
+        if self.status == Opt.FAILED:
             return f"FAILED: {self.error_message}"
 
         return self.format_results()
@@ -27,6 +27,45 @@ class Optimization:
     def __getitem__(self, key):
         return self.data.get(key, None)
     
+    def solutions(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (X, F): one row per solution with the variable values and the objective
+        values, for every result type.
+        """
+        results = self.data.get('data', None)
+        match self.data.get('type', None):
+            case 'single':
+                return np.atleast_2d(results.x), np.atleast_2d(results.fun)
+            case 'multi' | 'NBI' | 'EPSILON':
+                return np.array([res.x for res in results['results']], dtype=float), np.array(results['points'], dtype=float)
+            case _:
+                return np.atleast_2d(results['vars']), np.atleast_2d(results['sols'])
+
+    def to_dict(self) -> dict:
+        """
+        Plain (JSON serializable) summary of the run and its solutions.
+        """
+        if isinstance(self.fnc, str):
+            self.fnc = InputFile(self.fnc, is_file=False)
+
+        if self.status == Opt.FAILED:
+            return {'status': 'failed', 'error': str(self.error_message)}
+
+        X, F = self.solutions()
+        variables  = [var.symbol for var in self.fnc.variables] if self.fnc else [f"x{i + 1}" for i in range(X.shape[-1])]
+        objectives = [obj.name for obj in self.fnc.objectives] if self.fnc else [f"f{i + 1}" for i in range(F.shape[-1])]
+
+        ret = {'status': 'success', 'type': self.data['type'], 'time': self.data['time'], 'partial': bool(self.data.get('partial', False))}
+        for key in ('success_rate', 'starts', 'workers', 'local_solves', 'weights', 'clustering'):
+            if self.data.get(key) is not None:
+                ret[key] = self.data[key]
+        ret['variables']  = variables
+        ret['objectives'] = objectives
+        ret['solutions']  = [
+            {'x': dict(zip(variables, map(float, x))), 'f': dict(zip(objectives, map(float, f)))} for x, f in zip(X, F)
+        ]
+        return ret
+
     def format_results(self) -> str:
         if isinstance(self.fnc, str):
             self.fnc = InputFile(self.fnc, is_file=False)
@@ -49,8 +88,14 @@ class Optimization:
             ret += f"{'—' * 64}\n"
             for i, var in enumerate(self.fnc.variables):
                 ret += f" - {var.symbol}: {results.x[i]}\n"
+
+            if self.data.get('starts_per_sec'):
+                ret += f"\nStarts: {self.data['starts']} on {self.data['workers']} worker(s) ({self.data['starts_per_sec']:.1f} starts/sec)\n"
+
+            if clustering := self.data.get('clustering'):
+                ret += f"Clustering: {clustering['samples']} samples, {clustering['launched']} local solves launched, {clustering['skipped']} skipped, {clustering['minima']} distinct minima\n"
         
-        elif run_type == 'multi':
+        elif run_type in ('multi', 'NBI', 'EPSILON'):
             ret += f"Objective Functions ({', '.join(obj.name for obj in self.fnc.objectives)}):\n"
 
             points = np.array(results['points'])
@@ -62,7 +107,10 @@ class Optimization:
 
 
         ret += f"{'—' * 64}\n"
-        ret += f"Job completed successfully\n"
+        if self.data.get('partial'):
+            ret += f"Job stopped early, results are partial\n"
+        else:
+            ret += f"Job completed successfully\n"
         ret += f"=================================\n"
 
         hours, remainder = divmod(self.data['time'], 3600)
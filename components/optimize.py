@@ -1,25 +1,28 @@
+from __future__ import annotations
+
 from components.inputfnc2 import InputFile
-from components.fnc_objects import Function
+from components.fnc_objects import Function, Variable
+from components.checkpoint import Checkpoint
+from components.hypercube import lhs
 from components.optimization_data import Optimization, Opt
 
-from pymoo.algorithms.moo.nsga2 import NSGA2
-from pymoo.algorithms.moo.nsga3 import NSGA3
-from pymoo.util.ref_dirs import get_reference_directions
-from pymoo.operators.crossover.sbx import SBX
-from pymoo.operators.mutation.pm import PM
-from pymoo.problems.functional import FunctionalProblem
-from pymoo.optimize import minimize as pyminimize
-
-from scipy.optimize import NonlinearConstraint, minimize, OptimizeResult
-from scipy.stats.qmc import LatinHypercube
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
 import numpy as np
 import itertools
+import os
+import random
 
 from time import perf_counter
 import warnings
 
 from enum import Enum
 
+# scipy and pymoo are imported where they are used, so the GUI can import this
+# module (start strategies, worker counts) without loading the solver stack
+if TYPE_CHECKING:
+    from scipy.optimize import NonlinearConstraint, OptimizeResult
+
 warnings.filterwarnings(
     "ignore", category=RuntimeWarning, module="scipy.optimize._slsqp_py"
 )
@@ -30,6 +33,42 @@ def gen_guesses(bounds, samples: int = 5):
         *[np.linspace(_min, _max, samples) for _min, _max in bounds]
     )
 
+class StartStrategy(Enum):
+    GRID            = 0
+    SOBOL           = 1
+    HALTON          = 2
+    LATIN_HYPERCUBE = 3
+    RANDOM          = 4
+
+def gen_starts(variables: list[Variable], strategy: StartStrategy=StartStrategy.GRID, *, grid_size: int=5, n_starts: int=100, seed: int | None=0):
+    """
+    Starting points for multistart SLSQP. GRID is the full factorial of grid_size
+    points per variable (grid_size ** d starts); every other strategy draws exactly
+    n_starts points inside the variable bounds.
+    """
+    bounds = [(var.min, var.max) for var in variables]
+    if strategy == StartStrategy.GRID:
+        return gen_guesses(bounds, samples=grid_size)
+
+    from scipy.stats import qmc
+
+    l_bounds, u_bounds = [b[0] for b in bounds], [b[1] for b in bounds]
+    match strategy:
+        case StartStrategy.SOBOL:
+            with warnings.catch_warnings():
+                # Sobol prefers powers of two but any budget is valid
+                warnings.simplefilter("ignore", UserWarning)
+                sample = qmc.Sobol(len(variables), seed=seed).random(n_starts)
+            return qmc.scale(sample, l_bounds, u_bounds)
+        case StartStrategy.HALTON:
+            return qmc.scale(qmc.Halton(len(variables), seed=seed).random(n_starts), l_bounds, u_bounds)
+        case StartStrategy.LATIN_HYPERCUBE:
+            return lhs(variables, n_starts, seed=seed)
+        case StartStrategy.RANDOM:
+            return np.random.default_rng(seed).uniform(l_bounds, u_bounds, size=(n_starts, len(variables)))
+        case _:
+            raise ValueError(f"Unknown start strategy: {strategy}")
+
 def generate_weight_combinations(n: int, min_weight: float, step: float):
     total_units = int(round((1.0 - n * min_weight) / step))
 
@@ -45,21 +84,529 @@ def integer_partitions(n: int, total: int):
             for tail in integer_partitions(n - 1, total - i):
                 yield [i] + tail
 
+def order_weight_path(weights: list[list[float]]) -> list[int]:
+    """
+    Greedy nearest-neighbour ordering of weight vectors so consecutive weights
+    are close to each other (for warm-started continuation).
+    """
+    W = np.asarray(weights, dtype=float)
+    if len(W) == 0:
+        return []
+
+    remaining = np.ones(len(W), dtype=bool)
+    order = [0]
+    remaining[0] = False
+    for _ in range(len(W) - 1):
+        dist = np.linalg.norm(W - W[order[-1]], axis=1)
+        dist[~remaining] = np.inf
+        nxt = int(np.argmin(dist))
+        order.append(nxt)
+        remaining[nxt] = False
+
+    return order
+
 ### This is WAYYY faster than just making new Functions each time
 def generate_multi(functions: list[Function]) -> callable:
     def wrapper(x, weights: list[float]):
-        return sum(
-            w * f(x) for w, f in zip(weights, functions)
-        )
+        value, grad = 0.0, np.zeros(len(x))
+        for w, f in zip(weights, functions):
+            f_val, f_grad = f.value_and_grad(x)
+            value += w * f_val
+            grad  += w * f_grad
+        return value, grad
     
     return wrapper
 
-def generate_weighted_jacobian(functions: list[Function]) -> callable:
-    def wrapper(vals: list[float], weights: list[float]):
-        weighted_jacs = [w * np.array(f.jacobian(vals)) for w, f in zip(weights, functions)]
-        return np.sum(weighted_jacs, axis=0)
-    
-    return wrapper
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+### --- Multistart Workers ---
+# Each pool worker receives the compiled InputFile once through the initializer
+# instead of with every batch of starts
+_worker_input: InputFile = None
+_worker_shared: dict = {}
+
+def is_stopped(stop) -> bool:
+    return stop is not None and stop.is_set()
+
+def _init_worker(input: InputFile, shared: dict=None):
+    global _worker_input, _worker_shared
+    _worker_input = input
+    _worker_shared = shared or {}
+
+def _better(a: OptimizeResult, b: OptimizeResult) -> OptimizeResult:
+    # Lower objective wins; ties keep the earlier result
+    return b if b is not None and (a is None or a.fun > b.fun) else a
+
+def _single_starts(input: InputFile, guesses: list, tolerance: float, stop=None, on_start: callable=None) -> tuple[OptimizeResult, int, int]:
+    """
+    Run SLSQP from every guess (until stop is set) and return (best result, starts
+    run, starts failed). on_start(best, run, failed) is called after every start.
+    """
+    from scipy.optimize import minimize
+
+    constraints: list[NonlinearConstraint] = input.get_nonlinear_constraints()
+    bounds = input.get_bounds()
+
+    total, failed = 0, 0
+    best: OptimizeResult = None
+    for guess in guesses:
+        if is_stopped(stop):
+            break
+        total += 1
+        try:
+            result: OptimizeResult = minimize(
+                input.objectives[0].value_and_grad,
+                x0=guess,
+                method="SLSQP",
+                bounds=bounds,
+                constraints=constraints,
+                jac=True,
+                tol=tolerance,
+                options={"disp": False,
+                         "maxiter": 1000,
+                         "ftol": tolerance}
+            )
+        except Exception as e:
+            # A start that raises still counts as run, so progress and the checkpoint move past it
+            print(f"Error: {e} when running single-obj optimization on:\n{input}")
+            failed += 1
+        else:
+            if result.success:
+                best = _better(best, result)
+            else:
+                failed += 1
+
+        if on_start:
+            on_start(best, total, failed)
+
+    return best, total, failed
+
+def _merit(input: InputFile, X: np.ndarray, penalty: float) -> np.ndarray:
+    """
+    Cheap batched ranking of sample points: objective plus a penalty on constraint violation.
+    """
+    merit = input.objectives[0].eval_batch(X)
+    for eq in input.equality_constraints:
+        merit = merit + penalty * np.abs(eq.eval_batch(X))
+    for ineq in input.inequality_constraints:
+        merit = merit + penalty * np.maximum(ineq.eval_batch(X), 0)
+
+    return np.nan_to_num(merit, nan=np.inf)
+
+def _clustered_starts(
+    input: InputFile,
+    guesses,
+    tolerance: float,
+    batch_size: int=64,
+    reduce: float=0.2,
+    sigma: float=4.0,
+    max_stalls: int=3,
+    penalty: float=1e3,
+    progress: callable=None,
+    stop=None,
+) -> tuple[OptimizeResult, int, int, dict]:
+    """
+    Multi-level single-linkage multistart. Guesses are consumed in batches and only
+    ranked by a cheap batched evaluation; a local solve is launched from a point of
+    the best `reduce` fraction only if no better sample lies within the critical
+    distance and it is not within that distance of a minimum already found. Stops
+    after `max_stalls` batches in a row that neither improve the best solution nor
+    discover a new minimum.
+    Returns (best result, local solves launched, local solves failed, statistics).
+    """
+    from scipy.optimize import minimize
+    from scipy.special import gamma
+
+    constraints: list[NonlinearConstraint] = input.get_nonlinear_constraints()
+    bounds = input.get_bounds()
+    lower = np.array([b[0] for b in bounds], dtype=float)
+    span  = np.array([b[1] - b[0] for b in bounds], dtype=float)
+    span[span == 0] = 1.0
+    d = len(bounds)
+
+    samples = np.empty((0, d))
+    merits  = np.empty(0)
+    started = np.empty(0, dtype=bool)
+    minima: list[np.ndarray] = []   # found minima, scaled to the unit cube
+    minima_values: list[float] = []
+
+    best: OptimizeResult = None
+    launched, failed, stalls = 0, 0, 0
+    for chunk in chunked(guesses, batch_size):
+        if is_stopped(stop):
+            break
+        X = np.asarray(chunk, dtype=float)
+        samples = np.vstack([samples, X])
+        merits  = np.concatenate([merits, _merit(input, X, penalty)])
+        started = np.concatenate([started, np.zeros(len(X), dtype=bool)])
+
+        U = (samples - lower) / span
+        n = len(samples)
+        critical = (gamma(1 + d / 2) * sigma * np.log(n) / n) ** (1 / d) / np.sqrt(np.pi) if n > 1 else np.inf
+
+        improved = False
+        for i in np.argsort(merits)[:max(1, int(reduce * n))]:
+            if started[i] or is_stopped(stop):
+                continue
+
+            # A better sample nearby would drain into the same basin
+            dist = np.linalg.norm(U - U[i], axis=1)
+            if np.any((dist < critical) & (merits < merits[i])):
+                continue
+            # Same for a known minimum, unless this point is already lower than it (then it cannot be in that basin)
+            if minima and np.any((np.linalg.norm(np.array(minima) - U[i], axis=1) < critical) & (np.array(minima_values) <= merits[i])):
+                continue
+
+            started[i] = True
+            launched += 1
+            try:
+                result: OptimizeResult = minimize(
+                    input.objectives[0].value_and_grad,
+                    x0=samples[i],
+                    method="SLSQP",
+                    bounds=bounds,
+                    constraints=constraints,
+                    jac=True,
+                    tol=tolerance,
+                    options={"disp": False,
+                             "maxiter": 1000,
+                             "ftol": tolerance}
+                )
+            except Exception as e:
+                print(f"Error: {e} when running single-obj optimization on:\n{input}")
+                failed += 1
+                continue
+
+            if not result.success:
+                failed += 1
+                continue
+
+            u_min = (result.x - lower) / span
+            if not minima or np.min(np.linalg.norm(np.array(minima) - u_min, axis=1)) > np.sqrt(tolerance):
+                # A new basin means the search is still discovering the landscape
+                minima.append(u_min)
+                minima_values.append(result.fun)
+                improved = True
+
+            if best is None or best.fun - result.fun > tolerance * max(1.0, abs(best.fun)):
+                improved = True
+            if best is None or best.fun > result.fun:
+                best = result
+
+        stalls = 0 if improved else stalls + 1
+        if progress:
+            progress({'stage': 'starts', 'done': len(samples), 'total': len(guesses), 'best': best.fun if best else None, 'solves': launched})
+        if stalls >= max_stalls:
+            break
+
+    stats = {
+        'samples': len(samples),
+        'launched': launched,
+        'skipped': len(samples) - launched,
+        'minima': len(minima),
+    }
+    return best, launched, failed, stats
+
+def _single_starts_worker(guesses: list, tolerance: float) -> tuple[OptimizeResult, int, int]:
+    return _single_starts(_worker_input, guesses, tolerance, _worker_shared.get('stop'))
+
+def _weighted_solve(input: InputFile, weight: list[float], guesses: list, tolerance: float, ftol: float) -> OptimizeResult:
+    """
+    Best SLSQP result of the weighted-sum objective over all guesses (None if every start fails).
+    """
+    from scipy.optimize import minimize
+
+    multi_func = generate_multi(input.objectives)
+    constraints = input.get_nonlinear_constraints()
+    bounds = input.get_bounds()
+
+    def objective(x):
+        return multi_func(x, weight)
+
+    best_result: OptimizeResult = None
+    for guess in guesses:
+        try:
+            result: OptimizeResult = minimize(
+                objective,
+                x0=guess,
+                method="SLSQP",
+                bounds=bounds,
+                constraints=constraints,
+                jac=True,
+                tol=tolerance,
+                options={
+                    "disp": False,
+                    "maxiter": 1000,
+                    "ftol": ftol,
+                }
+            )
+
+            if result.success:
+                if best_result is None or best_result.fun > result.fun:
+                    best_result = result
+        except Exception as e:
+            print(f"Error: {e} when running multi-obj optimization on:\n{input}")
+
+    return best_result
+
+def _sweep_segment(
+    input: InputFile,
+    segment: list[tuple[int, list[float]]],
+    guesses: list,
+    tolerance: float,
+    ftol: float,
+    continuation: bool,
+    restart_every: int,
+    on_result: callable=None,
+    stop=None,
+) -> tuple[list[tuple[int, OptimizeResult]], int]:
+    """
+    Solve a run of (index, weight) pairs in order. With continuation each weight is
+    solved once from the previous optimum, with a full multistart on the first
+    weight of the segment, every restart_every weights and whenever the warm start
+    fails. Returns [(index, result or None)] and the number of local solves;
+    on_result(index, result) is also called as each weight finishes. Weights left
+    when stop is set are not solved or returned.
+    """
+    results: list[tuple[int, OptimizeResult]] = []
+    local_solves = 0
+    previous: OptimizeResult = None
+    for step, (index, weight) in enumerate(segment):
+        if is_stopped(stop):
+            break
+        best_result: OptimizeResult = None
+        warm = continuation and previous is not None and step % max(restart_every, 1) != 0
+        if warm:
+            best_result = _weighted_solve(input, weight, [previous.x], tolerance, ftol)
+            local_solves += 1
+
+        # Cold solve: the first weight, every restart_every-th weight, or a failed warm start
+        if best_result is None:
+            best_result = _weighted_solve(input, weight, guesses, tolerance, ftol)
+            local_solves += len(guesses)
+
+        results.append((index, best_result))
+        if on_result:
+            on_result(index, best_result)
+        if best_result:
+            previous = best_result
+
+    return results, local_solves
+
+def _sweep_segment_worker(segment: list[tuple[int, list[float]]]) -> tuple[list[tuple[int, OptimizeResult]], int]:
+    return _sweep_segment(_worker_input, segment, **_worker_shared)
+
+def _run_sweep(input: InputFile, path: list[tuple[int, list[float]]], shared: dict, workers: int, record: callable) -> int:
+    """
+    Solve every (index, weight) in path, serially or in a process pool, calling
+    record(index, result) for each. Returns the number of local solves.
+    """
+    if workers <= 1 or not path:
+        _, local_solves = _sweep_segment(input, path, **shared, on_result=record)
+        return local_solves
+
+    # Continuation needs long contiguous runs to stay warm, one per worker;
+    # independent weights are handed out in smaller chunks for load balancing
+    local_solves = 0
+    n_segments = workers if shared.get('continuation') else workers * 4
+    segment_size = max(1, -(-len(path) // n_segments))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(input, shared)) as pool:
+        for segment_results, segment_solves in pool.map(_sweep_segment_worker, chunked(path, segment_size)):
+            local_solves += segment_solves
+            for index, result in segment_results:
+                record(index, result)
+
+    return local_solves
+
+def weight_neighbors(weights: list[list[float]], step: float) -> set[tuple[int, int]]:
+    """
+    Pairs of lattice weights one step apart (one unit moved between two objectives).
+    """
+    W = np.asarray(weights, dtype=float)
+    pairs = set()
+    for i in range(len(W)):
+        diff = np.abs(W[i + 1:] - W[i]).sum(axis=1)
+        for j in np.nonzero(np.isclose(diff, 2 * step))[0]:
+            pairs.add((i, i + 1 + int(j)))
+
+    return pairs
+
+def _adaptive_sweep(
+    input: InputFile,
+    weights: list[list[float]],
+    step: float,
+    shared: dict,
+    workers: int,
+    target_spacing: float,
+    max_weights: int,
+    progress: callable=None,
+    min_gap: float=1e-4,
+    checkpoint: Checkpoint=None,
+) -> tuple[list[list[float]], dict[int, OptimizeResult], int, int]:
+    """
+    Solve a coarse weight lattice, then repeatedly bisect the weight edges whose
+    Pareto points are further apart than target_spacing in objective space
+    (normalized by the range of the front found so far). Stops when every edge is
+    resolved, an edge's weights differ by less than min_gap, or max_weights have
+    been solved. Returns (weights, results by index, failed, local solves).
+    """
+    edges = weight_neighbors(weights, step)
+
+    weights = [list(w) for w in weights]
+    found: dict[int, OptimizeResult] = {}
+    done: set[int] = set()
+    local_solves = 0
+
+    # The refined lattice and its edges are part of the state, not just the results
+    state = checkpoint.load() if checkpoint else None
+    if state:
+        weights, edges, found, done = state['weights'], state['edges'], state['found'], state['done']
+    points: dict[int, np.ndarray] = {
+        index: np.array([obj(result.x) for obj in input.objectives], dtype=float) for index, result in found.items()
+    }
+
+    def record(index: int, result: OptimizeResult):
+        done.add(index)
+        if result:
+            found[index] = result
+            points[index] = np.array([obj(result.x) for obj in input.objectives], dtype=float)
+        if progress:
+            progress({'stage': 'weights', 'done': len(done), 'total': len(weights), 'front': lambda: list(points.values())})
+        if checkpoint:
+            checkpoint.save({'weights': weights, 'edges': edges, 'found': found, 'done': done})
+
+    pending = [i for i in range(len(weights)) if i not in done]
+    while True:
+        if pending:
+            local_solves += _run_sweep(input, [(i, weights[i]) for i in pending], shared, workers, record)
+
+        if not points or len(weights) >= max_weights or is_stopped(shared.get('stop')):
+            break
+
+        front = np.array(list(points.values()))
+        scale = front.max(axis=0) - front.min(axis=0)
+        scale[scale == 0] = 1.0
+
+        pending = []
+        for a, b in sorted(edges):
+            if a not in points or b not in points:
+                continue
+            if np.linalg.norm((points[a] - points[b]) / scale) <= target_spacing:
+                continue
+            if np.abs(np.subtract(weights[a], weights[b])).max() < min_gap:
+                continue
+            if len(weights) >= max_weights:
+                break
+
+            # Bisect the edge: the midpoint of two valid weights is a valid weight
+            weights.append([round((wa + wb) / 2, 12) for wa, wb in zip(weights[a], weights[b])])
+            m = len(weights) - 1
+            edges.discard((a, b))
+            edges.update({(a, m), (m, b)})
+            pending.append(m)
+
+        if not pending:
+            break
+
+    return weights, found, len(done) - len(found), local_solves
+
+def _payoff(input: InputFile, guesses: list, tolerance: float, ftol: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Individual minima of every objective. Returns (X, F): X[i] minimizes objective
+    i and F[i] holds all objectives at X[i] (the payoff table; its diagonal is the
+    utopia point). Raises ValueError if an objective cannot be minimized.
+    """
+    n = len(input.objectives)
+    X, F = [], []
+    for i in range(n):
+        result = _weighted_solve(input, [1.0 if j == i else 0.0 for j in range(n)], guesses, tolerance, ftol)
+        if result is None:
+            raise ValueError(f"No successful solution found when minimizing {input.objectives[i].name.upper()} on its own.")
+        X.append(result.x)
+        F.append([obj(result.x) for obj in input.objectives])
+
+    return np.array(X, dtype=float), np.array(F, dtype=float)
+
+def _augmented_constraints(input: InputFile, extra: int) -> list[NonlinearConstraint]:
+    """
+    The problem's nonlinear constraints for a decision vector with `extra` trailing
+    auxiliary variables (which they do not depend on).
+    """
+    from scipy.optimize import NonlinearConstraint
+
+    ret: list[NonlinearConstraint] = []
+    for functions, lower in ((input.equality_constraints, 0), (input.inequality_constraints, -np.inf)):
+        for func in functions:
+            fun, jac = func.cached_value_and_grad()
+            ret.append(NonlinearConstraint(
+                lambda z, fun=fun: fun(z[:len(z) - extra]),
+                lower,
+                0,
+                jac=lambda z, jac=jac: np.concatenate([jac(z[:len(z) - extra]), np.zeros(extra)]),
+            ))
+
+    return ret
+
+def _subproblem(fun, x0_list: list, bounds, constraints, tolerance: float, ftol: float) -> OptimizeResult:
+    """
+    Solve from each start in turn and return the first success (None if all fail).
+    """
+    from scipy.optimize import minimize
+
+    for x0 in x0_list:
+        try:
+            result: OptimizeResult = minimize(
+                fun,
+                x0=x0,
+                method="SLSQP",
+                bounds=bounds,
+                constraints=constraints,
+                jac=True,
+                tol=tolerance,
+                options={
+                    "disp": False,
+                    "maxiter": 1000,
+                    "ftol": ftol,
+                }
+            )
+        except Exception as e:
+            print(f"Error: {e} when running multi-obj optimization.")
+            continue
+
+        if result.success:
+            return result
+
+    return None
+
+def _objective_points(input: InputFile, results: list[OptimizeResult]) -> list[list[float]]:
+    if not results:
+        return []
+    x_values = np.array([res.x for res in results])
+    return np.column_stack([obj_function.eval_batch(x_values) for obj_function in input.objectives]).tolist()
+
+def chunked(iterable, size: int):
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+def _stack(functions: list[Function], X: np.ndarray) -> np.ndarray:
+    if not functions:
+        return np.empty((len(X), 0))
+    return np.column_stack([f.eval_batch(X) for f in functions])
+
+def evaluate_population(input: InputFile, X: np.ndarray) -> dict[str, np.ndarray]:
+    return {
+        "F": _stack(input.objectives, X),
+        "G": _stack(input.inequality_constraints, X),
+        "H": _stack(input.equality_constraints, X),
+    }
+
+def evaluate_population_worker(X: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    evaluate_population in a pool process started with _init_worker (see evolve).
+    """
+    return evaluate_population(_worker_input, X)
 
 class EvolutionType(Enum):
     NSGAII  = 0
@@ -72,45 +619,100 @@ class Optimize:
         *,
         grid_size: int=5,
         tolerance: float=1e-6,
+        workers: int=1,
+        chunk_size: int=64,
+        strategy: StartStrategy=StartStrategy.GRID,
+        n_starts: int=100,
+        seed: int | None=0,
+        clustered: bool=False,
+        max_stalls: int=3,
+        progress: callable=None,
+        stop=None,
+        checkpoint: Checkpoint=None,
     ) -> Optimization:
+        """
+        Multistart SLSQP from every point given by gen_starts. With workers > 1 (or
+        None for every core) the starts are split into batches of chunk_size and
+        solved in a process pool; the best result is identical to a serial run.
+
+        With clustered=True the points are treated as cheap samples instead and local
+        solves are only launched from promising, unclustered ones (see _clustered_starts).
+        This mode runs serially.
+
+        Every solver takes an optional progress callable that is called with an event
+        dict as the run advances: 'stage' ('starts', 'weights', 'subproblems' or
+        'generation'), 'done' and 'total', plus 'best' (lowest objective so far) for
+        single-objective runs and 'front' for multi-objective ones. 'front' may be a
+        zero-argument callable so that consumers which throttle events only pay for
+        building the front when they actually use it.
+
+        Every solver also takes an optional stop flag (anything with is_set(), e.g. a
+        multiprocessing.Event). It is checked between local solves, weight vectors,
+        subproblems and generations; once set the solver returns what it has found so
+        far with 'partial' set in the result.
+
+        With a Checkpoint the solver periodically saves what it has finished (starts
+        solved, weight vectors and their optima, subproblems, the pymoo algorithm) and
+        picks up from a matching checkpoint instead of redoing that work. The file is
+        removed once a run completes. Clustered multistart is not checkpointed.
+        """
         if len(input.objectives) == 0:
             return Optimization(Opt.FAILED, "No objective function.")
         elif len(input.objectives) > 1:
             return Optimization(Opt.FAILED, f"Too many objective functions. Have {len(input.objectives)} expected 1.")
 
-        constraints: list[NonlinearConstraint] = input.get_nonlinear_constraints()
+        workers = workers or default_workers()
+        guesses = list(gen_starts(input.variables, strategy, grid_size=grid_size, n_starts=n_starts, seed=seed))
 
         opt_start_time = perf_counter()
         total, failed = 0, 0
         best: OptimizeResult = None
-        for guess in gen_guesses(input.get_bounds(), samples=grid_size):
-            total += 1
-            try:
-                result: OptimizeResult = minimize(
-                    input.objectives[0],
-                    x0=guess,
-                    method="SLSQP",
-                    bounds=input.get_bounds(),
-                    constraints=constraints,
-                    jac=input.objectives[0].jacobian,
-                    tol=tolerance,
-                    options={"disp": False,
-                             "maxiter": 1000,
-                             "ftol": tolerance}
-                )
-            except Exception as e:
-                print(f"Error: {e} when running single-obj optimization on:\n{input}")
-            
-            if result.success:
-                if best is None or best.fun > result.fun:
-                    best = result
-            else:
-                failed += 1
+        clustering: dict = None
+        if checkpoint and clustered:
+            checkpoint = None
+
+        # Starts are solved in order, so a checkpoint only needs how many are done
+        state = checkpoint.load() if checkpoint else None
+        if state:
+            total, failed, best = state['done'], state['failed'], state['best']
+        resumed_total = total
+
+        def record(best: OptimizeResult, total: int, failed: int):
+            if progress:
+                progress({'stage': 'starts', 'done': total, 'total': len(guesses), 'best': best.fun if best else None})
+            if checkpoint:
+                checkpoint.save({'done': total, 'failed': failed, 'best': best})
+
+        if clustered:
+            workers = 1
+            best, total, failed, clustering = _clustered_starts(input, guesses, tolerance, batch_size=chunk_size, max_stalls=max_stalls, progress=progress, stop=stop)
+        elif workers <= 1:
+            run_best, run_total, run_failed = _single_starts(
+                input, guesses[total:], tolerance, stop,
+                on_start=lambda b, t, f: record(_better(best, b), total + t, failed + f),
+            )
+            best, total, failed = _better(best, run_best), total + run_total, failed + run_failed
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(input, {'stop': stop})) as pool:
+                # map keeps submission order, so ties resolve exactly as in the serial loop
+                for chunk_best, chunk_total, chunk_failed in pool.map(_single_starts_worker, chunked(guesses[total:], chunk_size), itertools.repeat(tolerance)):
+                    total  += chunk_total
+                    failed += chunk_failed
+                    best = _better(best, chunk_best)
+                    record(best, total, failed)
+                    if is_stopped(stop):
+                        # Running chunks return early on their own; never start the rest
+                        pool.shutdown(cancel_futures=True)
+                        break
         
         opt_end_time = perf_counter()
+        if checkpoint:
+            checkpoint.finish(complete=total >= len(guesses))
         # print(f"FAILED: {failed} / {grid_size ** len(input.variables)} ({(100 * failed / (grid_size ** len(input.variables))):2f}%)")
         if best is None:
-            return Optimization(Opt.FAILED, f"No successful solution found with {grid_size ** len(input.variables)} initial points.")
+            if is_stopped(stop):
+                return Optimization(Opt.FAILED, f"Stopped before a solution was found ({total} initial points tried).")
+            return Optimization(Opt.FAILED, f"No successful solution found with {total} initial points.")
         
         return Optimization(
             Opt.SUCCESS,
@@ -118,7 +720,13 @@ class Optimize:
                 'type': 'single',
                 'time': opt_end_time - opt_start_time,
                 'data': best,
-                'success_rate': 1 - failed / total
+                'success_rate': 1 - failed / max(total, 1),
+                'partial': is_stopped(stop),
+                'starts': total,
+                'clustering': clustering,
+                'workers': workers,
+                # Only the starts solved by this run, not those restored from a checkpoint
+                'starts_per_sec': (total - resumed_total) / max(opt_end_time - opt_start_time, 1e-12),
             }
         )
     
@@ -131,78 +739,332 @@ class Optimize:
         grid_size: int=5,
         tolerance: float=1e-6,
         ftol: float=1e-6,
+        strategy: StartStrategy=StartStrategy.GRID,
+        n_starts: int=100,
+        seed: int | None=0,
+        continuation: bool=False,
+        restart_every: int=10,
+        workers: int=1,
+        progress: callable=None,
+        adaptive: bool=False,
+        target_spacing: float=0.05,
+        max_weights: int=1000,
+        stop=None,
+        checkpoint: Checkpoint=None,
     ) -> Optimization:
+        """
+        Weighted-sum sweep over generate_weight_combinations, solving each weight
+        vector with multistart SLSQP. With continuation=True the weights are ordered
+        along a nearest-neighbour path and each is solved once from the previous
+        weight's optimum, with a full multistart every restart_every weights (and
+        whenever the warm start fails).
+
+        With workers > 1 (or None for every core) the sweep is split across a process
+        pool; each worker receives the compiled problem and starting points once.
+        Continuation then runs one contiguous stretch of the path per worker.
+        progress (see single) is called as weight vectors complete, with the front
+        found so far.
+
+        With adaptive=True the lattice from min_weight/increment is only the coarse
+        starting set; weights are then inserted between neighbours whose Pareto
+        points are further apart than target_spacing (in objective space normalized
+        to the front's extent) until the front is resolved or max_weights is hit.
+        """
         if len(input.objectives) == 0:
             return Optimization(Opt.FAILED, "No objective function.")
         elif len(input.objectives) == 1:
             return Optimization(Opt.FAILED, f"Not enough objective functions. Have 1 expected >1 ({len(input.objectives)}).")
         
         len_objectives = len(input.objectives)
-        constraints = input.get_nonlinear_constraints()
+        workers = workers or default_workers()
+
+        opt_start_time = perf_counter()
+        guesses = list(gen_starts(input.variables, strategy, grid_size=grid_size, n_starts=n_starts, seed=seed))
+        weights = list(generate_weight_combinations(len_objectives, min_weight=min_weight, step=increment))
+
+        # Continuation walks the weights along a short path so each solve can start
+        # from the previous optimum; results are still reported in lattice order
+        order = order_weight_path(weights) if continuation else range(len(weights))
+        path = [(index, weights[index]) for index in order]
+        shared = {
+            'guesses': guesses,
+            'tolerance': tolerance,
+            'ftol': ftol,
+            'continuation': continuation,
+            'restart_every': restart_every,
+            'stop': stop,
+        }
+
+        total, local_solves = len(path), 0
+        found: dict[int, OptimizeResult] = {}
+        done: set[int] = set()
+        def record(index: int, result: OptimizeResult):
+            done.add(index)
+            if result:
+                found[index] = result
+            if progress:
+                progress({'stage': 'weights', 'done': len(done), 'total': total, 'front': lambda: _objective_points(input, list(found.values()))})
+            if checkpoint:
+                checkpoint.save({'found': found, 'done': done})
+
+        if adaptive:
+            weights, found, failed, local_solves = _adaptive_sweep(
+                input, weights, increment, shared, workers, target_spacing, max_weights, progress, checkpoint=checkpoint
+            )
+            total = len(weights)
+            complete = not is_stopped(stop)
+        else:
+            state = checkpoint.load() if checkpoint else None
+            if state:
+                found, done = state['found'], state['done']
+            local_solves = _run_sweep(input, [(index, weight) for index, weight in path if index not in done], shared, workers, record)
+            failed = len(done) - len(found)
+            complete = len(done) == total
+
+        if checkpoint:
+            checkpoint.finish(complete)
+
+        best_results: list[OptimizeResult] = [found[i] for i in sorted(found, key=lambda i: weights[i])]
+        
+        opt_end_time = perf_counter()
+        if not best_results and is_stopped(stop):
+            return Optimization(Opt.FAILED, "Stopped before any Pareto point was found.")
 
-        multi_func = generate_multi(input.functions)
-        multi_jac = generate_weighted_jacobian(input.functions)
+        points = _objective_points(input, best_results)
+
+        return Optimization(
+            Opt.SUCCESS,
+            {
+                'type': 'multi',
+                'time': opt_end_time - opt_start_time,
+                'data': {
+                    'results': best_results,
+                    'points': points
+                },
+                'success_rate': 1 - failed / max(len(found) + failed, 1),
+                'partial': is_stopped(stop),
+                'local_solves': local_solves,
+                'weights': total,
+            }
+        )
+    
+    @staticmethod
+    def nbi(
+        input: InputFile,
+        divisions: int=20,
+        *,
+        grid_size: int=5,
+        tolerance: float=1e-6,
+        ftol: float=1e-6,
+        strategy: StartStrategy=StartStrategy.GRID,
+        n_starts: int=100,
+        seed: int | None=0,
+        progress: callable=None,
+        stop=None,
+        checkpoint: Checkpoint=None,
+    ) -> Optimization:
+        """
+        Normal Boundary Intersection. The objectives are minimized individually
+        (multistart) to build the payoff table, then for every point beta of the
+        simplex lattice with `divisions` steps one SLSQP subproblem maximizes the
+        distance t along the quasi-normal from the convex hull of individual minima:
+
+            max t  s.t.  Phi beta + t n = F(x) - F*,  original constraints
+
+        in objectives normalized by the payoff table. Each subproblem is warm started
+        from the previous solution and only falls back to the starting points if that
+        fails. Unlike the weighted sum this reaches non-convex parts of the front.
+        """
+        from scipy.optimize import NonlinearConstraint
+
+        if len(input.objectives) < 2:
+            return Optimization(Opt.FAILED, f"Not enough objective functions. Have {len(input.objectives)} expected >1.")
 
         opt_start_time = perf_counter()
+        m = len(input.objectives)
+        guesses = list(gen_starts(input.variables, strategy, grid_size=grid_size, n_starts=n_starts, seed=seed))
+        try:
+            X_anchor, F_anchor = _payoff(input, guesses, tolerance, ftol)
+        except ValueError as e:
+            return Optimization(Opt.FAILED, str(e))
+
+        utopia = np.diag(F_anchor).copy()
+        scale = F_anchor.max(axis=0) - utopia
+        scale[scale <= 0] = 1.0
+
+        Phi = ((F_anchor - utopia) / scale).T     # column i: normalized F at the minimizer of objective i
+        normal = -Phi @ np.ones(m)
+
+        def objective(z):
+            grad = np.zeros(len(z))
+            grad[-1] = -1.0
+            return -z[-1], grad
+
+        # SLSQP asks for the constraint and its jacobian at the same z; each objective
+        # is evaluated once per point and shared between the two
+        cached = [obj.cached_value_and_grad() for obj in input.objectives]
+
+        def boundary(z, beta):
+            values = np.array([fun(z[:-1]) for fun, _ in cached], dtype=float)
+            return (values - utopia) / scale - Phi @ beta - z[-1] * normal
+
+        def boundary_jac(z, beta):
+            jac = np.array([jac(z[:-1]) for _, jac in cached], dtype=float)
+            return np.column_stack([jac / scale[:, None], -normal])
+
+        bounds = input.get_bounds() + [np.array([-np.inf, np.inf])]
+        constraints = _augmented_constraints(input, 1)
+
+        betas = list(generate_weight_combinations(m, min_weight=0.0, step=1 / max(divisions, 1)))
+
         total, failed = 0, 0
         best_results: list[OptimizeResult] = []
-        guesses = list(gen_guesses(input.get_bounds(), grid_size))
-        for weight in generate_weight_combinations(len_objectives, min_weight=min_weight, step=increment):
+        previous: np.ndarray = None
+        state = checkpoint.load() if checkpoint else None
+        if state:
+            total, failed, best_results, previous = state['done'], state['failed'], state['results'], state['previous']
+        for beta in betas[total:]:
+            if is_stopped(stop):
+                break
             total += 1
-            def objective(x):
-                return multi_func(x, weight)
-            def jacobian(x):
-                return multi_jac(x, weight)
-
-            best_result: OptimizeResult = None
-            for guess in guesses:
-                try:
-                    result: OptimizeResult = minimize(
-                        objective,
-                        x0=guess,
-                        method="SLSQP",
-                        bounds=input.get_bounds(),
-                        constraints=constraints,
-                        jac=jacobian,
-                        tol=tolerance,
-                        options={
-                            "disp": False,
-                            "maxiter": 1000,
-                            "ftol": ftol,
-                        }
-                    )
-
-                    if result.success:
-                        if best_result is None or best_result.fun > result.fun:
-                            best_result = result
-                except Exception as e:
-                    print(f"Error: {e} when running multi-obj optimization on:\n{input}")
-                
-            if best_result:
-                best_results.append(best_result)
+            beta = np.array(beta, dtype=float)
+            equality = NonlinearConstraint(
+                lambda z, beta=beta: boundary(z, beta), 0, 0,
+                jac=lambda z, beta=beta: boundary_jac(z, beta),
+            )
+
+            start = np.append(beta @ X_anchor, 0.0)
+            starts = ([previous] if previous is not None else []) + [start] + [np.append(g, 0.0) for g in guesses]
+            result = _subproblem(objective, starts, bounds, constraints + [equality], tolerance, ftol)
+            if result is None:
+                failed += 1
             else:
+                previous = result.x
+                result.x = result.x[:-1]
+                best_results.append(result)
+
+            if progress:
+                progress({'stage': 'subproblems', 'done': total, 'total': len(betas), 'front': lambda: _objective_points(input, best_results)})
+            if checkpoint:
+                checkpoint.save({'done': total, 'failed': failed, 'results': best_results, 'previous': previous})
+
+        if checkpoint:
+            checkpoint.finish(complete=total == len(betas))
+
+        opt_end_time = perf_counter()
+        if not best_results and is_stopped(stop):
+            return Optimization(Opt.FAILED, "Stopped before any Pareto point was found.")
+
+        points = _objective_points(input, best_results)
+
+        return Optimization(
+            Opt.SUCCESS,
+            {
+                'type': 'NBI',
+                'time': opt_end_time - opt_start_time,
+                'data': {
+                    'results': best_results,
+                    'points': points
+                },
+                'success_rate': 1 - failed / max(total, 1),
+                'partial': is_stopped(stop),
+            }
+        )
+
+    @staticmethod
+    def epsilon_constraint(
+        input: InputFile,
+        divisions: int=20,
+        *,
+        grid_size: int=5,
+        tolerance: float=1e-6,
+        ftol: float=1e-6,
+        strategy: StartStrategy=StartStrategy.GRID,
+        n_starts: int=100,
+        seed: int | None=0,
+        progress: callable=None,
+        stop=None,
+        checkpoint: Checkpoint=None,
+    ) -> Optimization:
+        """
+        Epsilon-constraint method. The first objective is minimized while every other
+        objective j is bounded by f_j <= eps_j, with each eps_j taking divisions + 1
+        evenly spaced levels between its individual minimum and its worst value in the
+        payoff table ((divisions + 1) ** (m - 1) SLSQP subproblems). Subproblems are
+        warm started from the previous solution and only fall back to the starting
+        points if that fails.
+        """
+        from scipy.optimize import NonlinearConstraint
+
+        if len(input.objectives) < 2:
+            return Optimization(Opt.FAILED, f"Not enough objective functions. Have {len(input.objectives)} expected >1.")
+
+        opt_start_time = perf_counter()
+        m = len(input.objectives)
+        guesses = list(gen_starts(input.variables, strategy, grid_size=grid_size, n_starts=n_starts, seed=seed))
+        try:
+            X_anchor, F_anchor = _payoff(input, guesses, tolerance, ftol)
+        except ValueError as e:
+            return Optimization(Opt.FAILED, str(e))
+
+        utopia = np.diag(F_anchor)
+        nadir = F_anchor.max(axis=0)
+        levels = [np.linspace(utopia[j], nadir[j], max(divisions, 1) + 1) for j in range(1, m)]
+
+        primary = input.objectives[0]
+        bounds = input.get_bounds()
+        base_constraints = input.get_nonlinear_constraints()
+        bounded = [obj.cached_value_and_grad() for obj in input.objectives[1:]]
+
+        n_subproblems = int(np.prod([len(level) for level in levels]))
+
+        total, failed = 0, 0
+        best_results: list[OptimizeResult] = []
+        previous: np.ndarray = None
+        state = checkpoint.load() if checkpoint else None
+        if state:
+            total, failed, best_results, previous = state['done'], state['failed'], state['results'], state['previous']
+        for epsilon in itertools.islice(itertools.product(*levels), total, None):
+            if is_stopped(stop):
+                break
+            total += 1
+            constraints = base_constraints + [
+                NonlinearConstraint(fun, -np.inf, eps, jac=jac) for (fun, jac), eps in zip(bounded, epsilon)
+            ]
+
+            starts = ([previous] if previous is not None else []) + list(X_anchor) + guesses
+            result = _subproblem(primary.value_and_grad, starts, bounds, constraints, tolerance, ftol)
+            if result is None:
                 failed += 1
-        
+            else:
+                previous = result.x
+                best_results.append(result)
+
+            if progress:
+                progress({'stage': 'subproblems', 'done': total, 'total': n_subproblems, 'front': lambda: _objective_points(input, best_results)})
+            if checkpoint:
+                checkpoint.save({'done': total, 'failed': failed, 'results': best_results, 'previous': previous})
+
+        if checkpoint:
+            checkpoint.finish(complete=total == n_subproblems)
+
         opt_end_time = perf_counter()
+        if not best_results and is_stopped(stop):
+            return Optimization(Opt.FAILED, "Stopped before any Pareto point was found.")
 
-        x_values = [res.x for res in best_results]
-        points = []
-        for x_val in x_values:
-            point = []
-            for obj_function in input.objectives:
-                point.append(obj_function(x_val))
-            points.append(point)
+        points = _objective_points(input, best_results)
 
         return Optimization(
             Opt.SUCCESS,
             {
-                'type': 'multi',
+                'type': 'EPSILON',
                 'time': opt_end_time - opt_start_time,
                 'data': {
                     'results': best_results,
                     'points': points
                 },
-                'success_rate': 1 - failed / total
+                'success_rate': 1 - failed / max(total, 1),
+                'partial': is_stopped(stop),
             }
         )
     
@@ -215,15 +1077,25 @@ class Optimize:
                partitions: int=100,
                algorithm: EvolutionType=EvolutionType.NSGAII,
                seed: int=0,
+               workers: int=1,
+               progress: callable=None,
+               stop=None,
+               checkpoint: Checkpoint=None,
     ) -> Optimization:
-        problem = FunctionalProblem(
-            n_var=len(input.variables),
-            objs=input.objectives,
-            constr_eq=input.equality_constraints,
-            constr_ieq=input.inequality_constraints,
-            xl=[var.min for var in input.variables],
-            xu=[var.max for var in input.variables],
-        )
+        """
+        NSGA-II/III through pymoo. With workers > 1 (or None for every core) each
+        generation's population is evaluated across a process pool; results are
+        identical to a serial run for the same seed. progress (see single) is called
+        after every generation with the current non-dominated front.
+        """
+        from pymoo.algorithms.moo.nsga2 import NSGA2
+        from pymoo.algorithms.moo.nsga3 import NSGA3
+        from pymoo.util.ref_dirs import get_reference_directions
+        from pymoo.operators.crossover.sbx import SBX
+        from pymoo.operators.mutation.pm import PM
+        from components.evolution import BatchProblem, GenerationCallback
+
+        workers = workers or default_workers()
         
         # SBX is simulated binary crossover - 90% probability of mutation
         # PM is polynomial mutation - 1% probability rate
@@ -243,14 +1115,35 @@ class Optimize:
             raise Exception("Invalid algorithm. Please choose either NSGAII or NSGAIII.")
 
         t = perf_counter()
-        res = pyminimize(
-            problem,
-            algo,
-            ('n_gen', generations),
-            seed=seed,
-            verbose=False,
-        )
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(input,)) if workers > 1 else None
+        try:
+            problem = BatchProblem(input, pool=pool, workers=workers)
+            callback = GenerationCallback(generations, progress, stop)
+            state = checkpoint.load() if checkpoint else None
+            if state:
+                # Carry on with the saved population and archive. pymoo 0.6.1 seeds and
+                # draws from the global generators rather than the algorithm's own, so
+                # their states are restored too
+                algo = state['algorithm']
+                algo.problem, algo.callback = problem, callback
+                algo.termination.force_termination = False
+                algo.termination.update(algo)
+                np.random.set_state(state['np_random'])
+                random.setstate(state['random'])
+            else:
+                algo.setup(problem, termination=('n_gen', generations), seed=seed, verbose=False, callback=callback)
+
+            while algo.has_next():
+                algo.next()
+                if checkpoint:
+                    checkpoint.save({'algorithm': algo, 'np_random': np.random.get_state(), 'random': random.getstate()})
+            res = algo.result()
+        finally:
+            if pool:
+                pool.shutdown()
         duration = perf_counter() - t
+        if checkpoint:
+            checkpoint.finish(complete=not is_stopped(stop))
 
         if res.F is None or len(res.F) == 0:
             return Optimization(Opt.FAILED, {'error': 'No solutions found.'})
@@ -264,11 +1157,13 @@ class Optimize:
             {
                 'type': results['alg'],
                 'time': results['time'],
+                'partial': is_stopped(stop),
                 'data': {
                     'crossover_rate': results['crs'],
                     'mutation_rate': results['mut'],
                     'pop' if 'pop' in results else 'n_parts': results.get('pop', results.get('n_parts', None)),
-                    'sols': results['sols']
+                    'sols': results['sols'],
+                    'vars': res.X,
                 }
             }
         )
@@ -1,4 +1,3 @@
-from scipy.stats import f
 import numpy as np
 import itertools
 
@@ -196,6 +195,7 @@ def calculate_statistics(X, y, y_pred) -> dict:
         F_stat = ((SS_tot - SS_res) / p) / (SS_res / (n - p - 1))
         
         # p-value for F-statistic
+        from scipy.stats import f
         p_value = f.sf(F_stat, p, n - p - 1)
         
         # PRESS (Leave-one-out cross-validation)
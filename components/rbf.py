@@ -1,10 +1,11 @@
 import numpy as np
-from scipy.spatial.distance import cdist
 from enum import Enum
 from components.fnc_objects import Variable, Function
-from components.optimize import gen_guesses
+from components.compile_cache import make_key
+from functools import partial
 import re
 import itertools
+import warnings
 
 class RBFType(Enum):
     LINEAR = 0
@@ -69,6 +70,95 @@ def rbf_kernel(r, kernel: RBFType, epsilon=1.0):
     else:
         raise NotImplementedError(kernel)
 
+def rbf_kernel_gradient_factor(r, kernel: RBFType, epsilon=1.0):
+    """
+    phi'(r) / r for distance matrix r, so the gradient of phi(|x - c|) is this
+    factor times (x - c). Where the limit at r = 0 is not finite (linear, thin
+    plate spline, CS_*_0) the kernel has a cusp or flat point there and 0 is used.
+    """
+    rho = epsilon * r
+
+    if kernel == RBFType.GAUSSIAN:
+        return -2 * epsilon**2 * np.exp(-rho**2)
+
+    elif kernel == RBFType.MULTIQUADRIC:
+        return epsilon**2 / np.sqrt(1 + rho**2)
+
+    elif kernel == RBFType.INVERSE_MULTIQUADRIC:
+        return -epsilon**2 / (1 + rho**2)**1.5
+
+    elif kernel == RBFType.LINEAR:
+        with np.errstate(divide='ignore'):
+            return np.where(r > 1e-10, 1 / r, 0)
+
+    elif kernel == RBFType.CUBIC:
+        return 3 * r
+
+    elif kernel == RBFType.THIN_PLATE_SPLINE:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(r > 1e-10, 2 * np.log(r) + 1, 0)
+
+    t = np.maximum(0.0, 1.0 - rho)
+    if kernel in (RBFType.CS_2_0, RBFType.CS_3_0):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(r > 1e-10, -2 * epsilon * t / r, 0)
+
+    elif kernel in (RBFType.CS_2_1, RBFType.CS_3_1):
+        return -20 * epsilon**2 * t**3
+
+    elif kernel in (RBFType.CS_2_2, RBFType.CS_3_2):
+        return -56 * epsilon**2 * t**5 * (5*rho + 1)
+
+    elif kernel == RBFType.CS_3_3:
+        return -22 * epsilon**2 * t**7 * (16*rho**2 + 7*rho + 1)
+
+    else:
+        raise NotImplementedError(kernel)
+
+def rbf_kernel_hessian_factor(r, kernel: RBFType, epsilon=1.0):
+    """
+    psi'(r) / r for distance matrix r, with psi from rbf_kernel_gradient_factor, so
+    the Hessian of phi(|x - c|) is psi I + this factor times (x - c)(x - c)^T. At
+    r = 0 the outer product vanishes and 0 is used.
+    """
+    rho = epsilon * r
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inverse = np.where(r > 1e-10, 1 / r, 0)
+
+    if kernel == RBFType.GAUSSIAN:
+        return 4 * epsilon**4 * np.exp(-rho**2)
+
+    elif kernel == RBFType.MULTIQUADRIC:
+        return -epsilon**4 / (1 + rho**2)**1.5
+
+    elif kernel == RBFType.INVERSE_MULTIQUADRIC:
+        return 3 * epsilon**4 / (1 + rho**2)**2.5
+
+    elif kernel == RBFType.LINEAR:
+        return -inverse**3
+
+    elif kernel == RBFType.CUBIC:
+        return 3 * inverse
+
+    elif kernel == RBFType.THIN_PLATE_SPLINE:
+        return 2 * inverse**2
+
+    t = np.maximum(0.0, 1.0 - rho)
+    if kernel in (RBFType.CS_2_0, RBFType.CS_3_0):
+        return np.where(rho < 1, 2 * epsilon * inverse**3, 0)
+
+    elif kernel in (RBFType.CS_2_1, RBFType.CS_3_1):
+        return 60 * epsilon**3 * t**2 * inverse
+
+    elif kernel in (RBFType.CS_2_2, RBFType.CS_3_2):
+        return 1680 * epsilon**4 * t**4
+
+    elif kernel == RBFType.CS_3_3:
+        return 528 * epsilon**4 * t**6 * (6*rho + 1)
+
+    else:
+        raise NotImplementedError(kernel)
+
 def needs_polynomial(kernel: RBFType):
     """Check if kernel requires polynomial augmentation."""
     # Conditionally positive definite kernels need polynomial terms
@@ -88,7 +178,112 @@ def build_polynomial_matrix(X, degree=1):
     else:
         raise NotImplementedError(f"Polynomial degree {degree} not implemented")
 
-def fit_rbf(X: np.ndarray, y: np.ndarray, kernel: RBFType, epsilon: float=1.0, smooth: float=0.0, poly_order: int | None=None):
+# Compact kernels with at least this many centers, whose support radius 1/epsilon
+# takes in at most this fraction of them, are assembled and evaluated sparsely
+SPARSE_MIN_POINTS = 2000
+SPARSE_MAX_DENSITY = 0.05
+
+def is_compact(kernel: RBFType) -> bool:
+    """Check if kernel is compactly supported (zero beyond r = 1/epsilon)."""
+    return kernel.name.startswith("CS_")
+
+def _center_tree(weights_dict):
+    # Built on first use and kept with the weights
+    if weights_dict.get('tree') is None:
+        from scipy.spatial import cKDTree
+        weights_dict['tree'] = cKDTree(weights_dict['centers'])
+    return weights_dict['tree']
+
+def use_sparse(weights_dict, kernel: RBFType, epsilon=1.0) -> bool:
+    """
+    Whether the model is assembled and evaluated with sparse matrices. Decided once
+    from the number of centers and the neighbor count of a sample of them, then
+    kept in weights_dict['sparse'] (which fit_rbf's sparse argument can preset).
+    """
+    if weights_dict.get('sparse') is None:
+        X = weights_dict['centers']
+        sparse = False
+        if is_compact(kernel) and len(X) >= SPARSE_MIN_POINTS:
+            from scipy.spatial import cKDTree
+            sample = X[::max(1, len(X) // 256)]
+            pairs = _center_tree(weights_dict).count_neighbors(cKDTree(sample), 1 / epsilon)
+            sparse = pairs <= SPARSE_MAX_DENSITY * len(sample) * len(X)
+        weights_dict['sparse'] = bool(sparse)
+
+    return weights_dict['sparse']
+
+def _distances(X_eval, weights_dict, kernel: RBFType, epsilon):
+    # Dense (m, n) distances to the centers, or for sparse models a CSR matrix of
+    # only the pairs inside the support radius (coincident points are kept)
+    X = weights_dict['centers']
+    if not use_sparse(weights_dict, kernel, epsilon):
+        from scipy.spatial.distance import cdist
+        return cdist(X_eval, X)
+
+    from scipy.sparse import csr_matrix
+    from scipy.spatial import cKDTree
+    pairs = cKDTree(X_eval).sparse_distance_matrix(_center_tree(weights_dict), 1 / epsilon, output_type='ndarray')
+    return csr_matrix((pairs['v'], (pairs['i'], pairs['j'])), shape=(len(X_eval), len(X)))
+
+def _apply(factor, D, kernel: RBFType, epsilon):
+    # Elementwise kernel factor of a dense or sparse distance matrix; every factor
+    # of a compact kernel is zero outside its support, so the sparsity is kept
+    from scipy.sparse import issparse
+    if issparse(D):
+        result = D.copy()
+        result.data = factor(D.data, kernel, epsilon)
+        return result
+    return factor(D, kernel, epsilon)
+
+def _solve_sparse(K, y, P=None):
+    # K of a compact kernel is symmetric positive definite, so it is solved with
+    # conjugate gradients: memory stays proportional to the nonzeros, where a
+    # sparse LU of a 3-D point set fills in badly. With a polynomial tail the
+    # iteration is projected onto P^T w = 0, where K is still positive definite,
+    # and the tail weights follow from the residual.
+    from scipy.sparse.linalg import LinearOperator, cg
+
+    if P is None:
+        project = lambda v: v
+    else:
+        Q, _ = np.linalg.qr(P)
+        project = lambda v: v - Q @ (Q.T @ v)
+
+    operator = LinearOperator(K.shape, matvec=lambda v: project(K @ project(v)), dtype=float)
+    def solve(b):
+        x, info = cg(operator, project(b), rtol=1e-10)
+        if info != 0:
+            raise np.linalg.LinAlgError("Sparse RBF system did not converge; try a larger epsilon (smaller support) or smoothing.")
+        return x
+
+    # Each response of a multi-output fit is its own iteration
+    rbf_weights = solve(y) if y.ndim == 1 else np.column_stack([solve(column) for column in y.T])
+
+    if P is None:
+        return rbf_weights, None
+
+    rbf_weights = project(rbf_weights)
+    poly_weights = np.linalg.lstsq(P, y - K @ rbf_weights, rcond=None)[0]
+    return rbf_weights, poly_weights
+
+def _dense_system(X, K, smooth: float, poly_order: int | None):
+    # The interpolation matrix, bordered by the polynomial basis when there is a tail
+    n = len(X)
+    if smooth > 0:
+        K = K + np.eye(n) * smooth
+    if poly_order is None:
+        return K
+
+    P = build_polynomial_matrix(X, degree=poly_order)
+    m = P.shape[1]
+
+    A = np.zeros((n + m, n + m))
+    A[:n, :n] = K
+    A[:n, n:] = P
+    A[n:, :n] = P.T
+    return A
+
+def fit_rbf(X: np.ndarray, y: np.ndarray, kernel: RBFType, epsilon: float | None=1.0, smooth: float | None=0.0, poly_order: int | None=None, sparse: bool | None=None):
     """
     Fit RBF interpolation to data.
     
@@ -96,66 +291,225 @@ def fit_rbf(X: np.ndarray, y: np.ndarray, kernel: RBFType, epsilon: float=1.0, s
     -----------
     X : array-like, shape (n, d)
         Input points
-    y : array-like, shape (n,)
-        Target values
+    y : array-like, shape (n,) or (n, k)
+        Target values; k responses are fitted together from one factorization
     kernel : RBFType
         RBF kernel type
-    epsilon : float
-        Shape parameter for the kernel
-    smooth : float
-        Smoothing/regularization parameter (0 = exact interpolation)
+    epsilon : float or None
+        Shape parameter for the kernel. If None, chosen by select_rbf_parameters.
+    smooth : float or None
+        Smoothing/regularization parameter (0 = exact interpolation). If None,
+        chosen by select_rbf_parameters.
     poly_order : int or None
         Whether to include polynomial terms. If None, automatically determined.
+    sparse : bool or None
+        Assemble the system with sparse matrices and solve it iteratively (compact
+        kernels only). If None, automatically determined by use_sparse.
     
     Returns:
     --------
     weights : dict
-        Dictionary containing 'rbf_weights' and optionally 'poly_weights'
+        Dictionary containing 'rbf_weights' and optionally 'poly_weights' (with a
+        column per response when y is 2-D, see split_outputs), plus 'selection'
+        when epsilon or smooth was chosen automatically
     """
-    X = np.asarray(X)
+    X = np.asarray(X, dtype=float)
     y = np.asarray(y)
     n = len(X)
     
     if poly_order is None:
         poly_order = needs_polynomial(kernel)  # must return int or None
 
+    selection = {}
+    if epsilon is None or smooth is None:
+        chosen = select_rbf_parameters(X, y, kernel, epsilon=epsilon, smooth=smooth, poly_order=poly_order)
+        epsilon, smooth = chosen['epsilon'], chosen['smooth']
+        selection = {'selection': chosen}
+
+    weights = {'centers': X, 'sparse': None if sparse is None else bool(sparse and is_compact(kernel))}
+
     # Build kernel matrix
-    D = cdist(X, X)
-    K = rbf_kernel(D, kernel, epsilon)
+    K = _apply(rbf_kernel, _distances(X, weights, kernel, epsilon), kernel, epsilon)
 
-    # ---- NO polynomial terms ----
-    if poly_order is None:
+    # ---- SPARSE (compact kernels, many points) ----
+    if use_sparse(weights, kernel, epsilon):
         if smooth > 0:
-            K += np.eye(n) * smooth
-        rbf_weights = np.linalg.solve(K, y)
-        return {
-            'rbf_weights': rbf_weights,
-            'poly_weights': None,
-            'centers': X
-        }
+            from scipy.sparse import identity
+            K = K + identity(n, format='csr') * smooth
+        P = None if poly_order is None else build_polynomial_matrix(X, degree=poly_order)
+        rbf_weights, poly_weights = _solve_sparse(K.tocsr(), y, P)
+        return {**weights, 'rbf_weights': rbf_weights, 'poly_weights': poly_weights, **selection}
+
+    # ---- DENSE ----
+    # One symmetric (LDL^T) factorization of A serves every response column
+    from scipy.linalg import LinAlgWarning, solve
+
+    A = _dense_system(X, K, smooth, poly_order)
+    b = np.zeros((len(A),) + y.shape[1:])
+    b[:n] = y
 
-    # ---- WITH polynomial terms ----
-    P = build_polynomial_matrix(X, degree=poly_order)
-    m = P.shape[1]
+    # Flat kernels are routinely ill-conditioned; like np.linalg.solve, stay quiet about it
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', LinAlgWarning)
+        solution = solve(A, b, assume_a='sym')
 
-    A = np.zeros((n + m, n + m))
-    A[:n, :n] = K
-    if smooth > 0:
-        A[:n, :n] += np.eye(n) * smooth
-    A[:n, n:] = P
-    A[n:, :n] = P.T
+    return {
+        **weights,
+        'rbf_weights': solution[:n],
+        'poly_weights': None if poly_order is None else solution[n:],
+        **selection,
+    }
 
-    b = np.zeros(n + m)
-    b[:n] = y
+# Kernels whose shape depends on epsilon; linear, cubic and thin plate spline do not
+SHAPE_KERNELS = tuple(kernel for kernel in RBFType if kernel not in (RBFType.LINEAR, RBFType.CUBIC, RBFType.THIN_PLATE_SPLINE))
+# Larger designs select their parameters on a subsample of this many points
+LOO_MAX_POINTS = 1000
+
+def loo_errors(X: np.ndarray, y: np.ndarray, kernel: RBFType, epsilon: float=1.0, smooth: float=0.0, poly_order: int | None=None) -> np.ndarray:
+    """
+    Leave-one-out residuals y_k - s_(k)(x_k), where s_(k) is fitted without point
+    k, from a single inverse of the system matrix A (Rippa 1999):
+    e_k = c_k / (A^-1)_kk with c = A^-1 [y, 0]. y may hold a column per response.
+    Non-finite when A is singular.
+    """
+    from scipy.spatial.distance import cdist
+
+    X = np.asarray(X, dtype=float)
+    n = len(X)
+    A = _dense_system(X, rbf_kernel(cdist(X, X), kernel, epsilon), smooth, poly_order)
+    try:
+        inverse = np.linalg.inv(A)
+    except np.linalg.LinAlgError:
+        return np.full(np.shape(y), np.inf)
+
+    coefficients = inverse[:n, :n] @ y
+    return (coefficients.T / np.diag(inverse)[:n]).T
+
+def _bounded_search(cost: callable, lower: float, upper: float, points: int=12) -> tuple[float, float]:
+    # A coarse grid guards against the local minima LOO curves often have; the
+    # best grid cell is then refined with a bounded Brent search
+    from scipy.optimize import minimize_scalar
+
+    grid = np.linspace(lower, upper, points)
+    costs = [cost(t) for t in grid]
+    best = int(np.argmin(costs))
+
+    result = minimize_scalar(cost, bounds=(grid[max(best - 1, 0)], grid[min(best + 1, points - 1)]), method='bounded', options={'xatol': 1e-3})
+    if result.fun < costs[best]:
+        return float(result.x), float(result.fun)
+    return float(grid[best]), float(costs[best])
+
+def select_rbf_parameters(X: np.ndarray, y: np.ndarray, kernel: RBFType, epsilon: float | None=None, smooth: float | None=0.0, poly_order: int | None=None) -> dict:
+    """
+    Choose epsilon and/or smooth (whichever is None) by minimizing the RMS of
+    loo_errors with a bounded search over their logarithms: epsilon from
+    0.1 / (design diameter) to 10 / (median point spacing), smooth from 1e-12 to
+    1e-1 times the largest kernel value. Smoothing is only kept when it lowers
+    the error of the unsmoothed fit; with both free the two searches alternate
+    twice.
+
+    The columns of a 2-D y share one epsilon and smooth, chosen on the mean of
+    their errors relative to each column's spread.
+
+    Designs larger than LOO_MAX_POINTS are searched on an even subsample, and
+    epsilon is rescaled by the ratio of the point spacings so each center keeps
+    the same number of neighbors.
+
+    Returns {'epsilon', 'smooth', 'loo_rms', 'loo_points'}, with loo_rms a list
+    per column for a 2-D y.
+    """
+    from scipy.spatial import cKDTree
+    from scipy.spatial.distance import cdist
+
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n, d = X.shape
+
+    sample = np.arange(n)
+    if n > LOO_MAX_POINTS:
+        sample = np.linspace(0, n - 1, LOO_MAX_POINTS).round().astype(int)
+    Xs, ys = X[sample], y[sample]
+
+    def rms(errors):
+        value = np.sqrt(np.mean(errors**2))
+        return value if np.isfinite(value) else np.inf
+
+    # Scales of the sampled design: its diameter and median nearest-neighbor distance
+    diameter = np.linalg.norm(Xs.max(axis=0) - Xs.min(axis=0)) or 1.0
+    spacing = np.median(cKDTree(Xs).query(Xs, k=2)[0][:, 1]) or diameter / len(Xs)
+
+    spread = np.std(ys, axis=0)
+    spread = np.where(spread > 0, spread, 1.0)
 
-    solution = np.linalg.solve(A, b)
+    def loo_rms(epsilon, smooth):
+        return rms(loo_errors(Xs, ys, kernel, epsilon, smooth, poly_order) / spread)
+
+    def search_epsilon(smooth):
+        log_epsilon, cost = _bounded_search(lambda t: loo_rms(10**t, smooth), np.log10(0.1 / diameter), np.log10(10 / spacing))
+        return 10**log_epsilon, cost
+
+    def search_smooth(epsilon):
+        # Relative to the kernel's magnitude; no smoothing unless it helps
+        scale = np.abs(rbf_kernel(cdist(Xs, Xs), kernel, epsilon)).max() or 1.0
+        log_smooth, cost = _bounded_search(lambda t: loo_rms(epsilon, scale * 10**t), -12, -1)
+        unsmoothed = loo_rms(epsilon, 0.0)
+        return (scale * 10**log_smooth, cost) if cost < unsmoothed else (0.0, unsmoothed)
+
+    search_shape = epsilon is None and kernel in SHAPE_KERNELS
+    chosen_epsilon = epsilon if epsilon is not None else 1.0
+    chosen_smooth = smooth if smooth is not None else 0.0
+
+    if search_shape and smooth is None:
+        # Both free: alternate twice, since the best shape of noisy data depends on the smoothing
+        for _ in range(2):
+            chosen_epsilon, _ = search_epsilon(chosen_smooth)
+            chosen_smooth, _ = search_smooth(chosen_epsilon)
+    elif search_shape:
+        chosen_epsilon, _ = search_epsilon(chosen_smooth)
+    elif smooth is None:
+        chosen_smooth, _ = search_smooth(chosen_epsilon)
+
+    errors = loo_errors(Xs, ys, kernel, chosen_epsilon, chosen_smooth, poly_order)
+    errors_rms = np.sqrt(np.mean(errors**2, axis=0))
+
+    if search_shape and len(sample) < n:
+        chosen_epsilon *= (n / len(sample))**(1 / d)
 
     return {
-        'rbf_weights': solution[:n],
-        'poly_weights': solution[n:],
-        'centers': X
+        'epsilon': float(chosen_epsilon),
+        'smooth': float(chosen_smooth),
+        'loo_rms': errors_rms.tolist() if errors_rms.ndim else float(errors_rms),
+        'loo_points': len(sample),
     }
 
+def split_outputs(weights_dict) -> list[dict]:
+    """
+    One single-response weights dict per column of a multi-output fit_rbf result
+    (for grad_rbf, hessian_rbf and RBFModel, which take one response). The columns
+    share the centers, KD-tree and sparse decision.
+    """
+    rbf_weights = weights_dict['rbf_weights']
+    poly_weights = weights_dict.get('poly_weights')
+    selection = weights_dict.get('selection')
+
+    outputs = []
+    for j in range(rbf_weights.shape[1]):
+        output = {**weights_dict, 'rbf_weights': rbf_weights[:, j], 'poly_weights': None if poly_weights is None else poly_weights[:, j]}
+        if selection is not None:
+            output['selection'] = {**selection, 'loo_rms': selection['loo_rms'][j]}
+        outputs.append(output)
+
+    return outputs
+
+# Evaluation points are processed in row blocks of about this many point-center
+# pairs, so the distance and kernel matrices stay bounded in memory however many
+# points and centers there are
+EVAL_BLOCK_PAIRS = 1_000_000
+
+def _row_blocks(X_eval, weights_dict) -> list[np.ndarray]:
+    rows = max(1, EVAL_BLOCK_PAIRS // max(1, len(weights_dict['centers'])))
+    return [X_eval[i:i + rows] for i in range(0, len(X_eval), rows)] or [X_eval]
+
 def eval_rbf(X_eval, weights_dict, kernel: RBFType, epsilon=1.0):
     """
     Evaluate RBF interpolant at new points.
@@ -173,103 +527,352 @@ def eval_rbf(X_eval, weights_dict, kernel: RBFType, epsilon=1.0):
     
     Returns:
     --------
-    y_eval : array, shape (m,)
-        Interpolated values
+    y_eval : array, shape (m,) or (m, k)
+        Interpolated values (a column per response of a multi-output fit)
     """
-    X_eval = np.asarray(X_eval)
-    X = weights_dict['centers']
+    X_eval = np.atleast_2d(np.asarray(X_eval, dtype=float))
+    blocks = _row_blocks(X_eval, weights_dict)
+    if len(blocks) > 1:
+        return np.concatenate([eval_rbf(block, weights_dict, kernel, epsilon) for block in blocks])
+
     rbf_weights = weights_dict['rbf_weights']
     poly_weights = weights_dict.get('poly_weights')
-    
+
     # Evaluate RBF terms
-    D = cdist(X_eval, X)
-    K = rbf_kernel(D, kernel, epsilon)
+    K = _apply(rbf_kernel, _distances(X_eval, weights_dict, kernel, epsilon), kernel, epsilon)
     y_eval = K @ rbf_weights
     
-    # Add polynomial terms if present
+    # Add polynomial terms if present (a single weight is the constant-only tail)
     if poly_weights is not None:
-        P = build_polynomial_matrix(X_eval, degree=1)
+        P = build_polynomial_matrix(X_eval, degree=0 if len(poly_weights) == 1 else 1)
         y_eval += P @ poly_weights
     
     return y_eval
 
-def rbf_term_str(w, center, kernel: RBFType, epsilon=1.0):
-    """Generate string representation of single RBF term."""
-    dist_sq = " + ".join(
-        [f"(x{i+1} - {v:.15g})**2" for i, v in enumerate(center)]
-    )
-    r = f"sqrt({dist_sq})"
-    eps_str = f"{epsilon:.15g}"
-    rho = f"{eps_str}*{r}"
-    t = f"max(0, 1 - {rho})"
-
-    if kernel == RBFType.GAUSSIAN:
-        core = f"exp(-({eps_str})**2 * ({dist_sq}))"
+def _gradient_terms(X_eval, D, weights_dict, kernel: RBFType, epsilon):
+    # With psi = phi'(r) / r the gradient at x is sum_k w_k psi(|x - c_k|) (x - c_k),
+    # evaluated as two (m, n) matrix products so no (m, n, d) array is formed
+    X = weights_dict['centers']
+    rbf_weights = weights_dict['rbf_weights']
+    poly_weights = weights_dict.get('poly_weights')
 
-    elif kernel == RBFType.MULTIQUADRIC:
-        core = f"sqrt(1 + ({eps_str}*{r})**2)"
+    psi = _apply(rbf_kernel_gradient_factor, D, kernel, epsilon)
+    gradient = X_eval * (psi @ rbf_weights)[:, None] - psi @ (rbf_weights[:, None] * X)
 
-    elif kernel == RBFType.INVERSE_MULTIQUADRIC:
-        core = f"1/sqrt(1 + ({eps_str}*{r})**2)"
+    # The linear tail adds its coefficients; the constant tail adds nothing
+    if poly_weights is not None and len(poly_weights) > 1:
+        gradient += poly_weights[1:]
 
-    elif kernel == RBFType.LINEAR:
-        core = r
+    return gradient
 
-    elif kernel == RBFType.CUBIC:
-        core = f"({r})**3"
+def grad_rbf(X_eval, weights_dict, kernel: RBFType, epsilon=1.0):
+    """
+    Gradient of the RBF interpolant at new points, shape (m, d).
+    """
+    X_eval = np.atleast_2d(np.asarray(X_eval, dtype=float))
+    blocks = _row_blocks(X_eval, weights_dict)
+    if len(blocks) > 1:
+        return np.concatenate([grad_rbf(block, weights_dict, kernel, epsilon) for block in blocks])
 
-    elif kernel == RBFType.THIN_PLATE_SPLINE:
-        core = f"({r})**2 * log({r}) if {r} > 0 else 0"
+    D = _distances(X_eval, weights_dict, kernel, epsilon)
+    return _gradient_terms(X_eval, D, weights_dict, kernel, epsilon)
 
-    elif kernel in (RBFType.CS_2_0, RBFType.CS_3_0):
-        core = f"({t})**2"
+def value_and_grad_rbf(X_eval, weights_dict, kernel: RBFType, epsilon=1.0):
+    """
+    Values, shape (m,), and gradients, shape (m, d), of the RBF interpolant from
+    one distance matrix.
+    """
+    X_eval = np.atleast_2d(np.asarray(X_eval, dtype=float))
+    blocks = _row_blocks(X_eval, weights_dict)
+    if len(blocks) > 1:
+        values, gradients = zip(*[value_and_grad_rbf(block, weights_dict, kernel, epsilon) for block in blocks])
+        return np.concatenate(values), np.concatenate(gradients)
 
-    elif kernel in (RBFType.CS_2_1, RBFType.CS_3_1):
-        core = f"({t})**4 * (4*{rho} + 1)"
+    rbf_weights = weights_dict['rbf_weights']
+    poly_weights = weights_dict.get('poly_weights')
 
-    elif kernel in (RBFType.CS_2_2, RBFType.CS_3_2):
-        core = f"({t})**6 * (35*{rho}**2 + 18*{rho} + 3)"
+    D = _distances(X_eval, weights_dict, kernel, epsilon)
+    values = _apply(rbf_kernel, D, kernel, epsilon) @ rbf_weights
+    if poly_weights is not None:
+        values += build_polynomial_matrix(X_eval, degree=0 if len(poly_weights) == 1 else 1) @ poly_weights
 
-    elif kernel == RBFType.CS_3_3:
-        core = f"({t})**8 * (32*{rho}**3 + 25*{rho}**2 + 8*{rho} + 1)"
+    return values, _gradient_terms(X_eval, D, weights_dict, kernel, epsilon)
 
-    else:
-        raise NotImplementedError(kernel)
+def hessian_rbf(X_eval, weights_dict, kernel: RBFType, epsilon=1.0):
+    """
+    Hessian of the RBF interpolant at new points, shape (m, d, d).
 
-    return f"{w:.15g} * ({core})"
+    Each term contributes psi I + chi (x - c)(x - c)^T with chi = psi'(r) / r. The
+    outer products are expanded around x so the sum over centers is again a few
+    matrix products. The polynomial tail is at most linear and adds nothing.
+    """
+    X_eval = np.atleast_2d(np.asarray(X_eval, dtype=float))
+    blocks = _row_blocks(X_eval, weights_dict)
+    if len(blocks) > 1:
+        return np.concatenate([hessian_rbf(block, weights_dict, kernel, epsilon) for block in blocks])
 
-def rbf_equation_str(weights_dict, kernel: RBFType, epsilon=1.0):
-    """Generate full equation string for RBF interpolant."""
+    X = weights_dict['centers']
     rbf_weights = weights_dict['rbf_weights']
-    centers = weights_dict['centers']
-    poly_weights = weights_dict.get('poly_weights')
-    
-    terms = [
-        rbf_term_str(w, c, kernel, epsilon)
-        for w, c in zip(rbf_weights, centers)
-    ]
-    
-    # Add polynomial terms if present
-    if poly_weights is not None:
-        n_dim = centers.shape[1]
-        terms.append(f"{poly_weights[0]:.15g}")  # constant
+    m, d = X_eval.shape
 
-        # Add linear terms only if they exist
-        for i in range(1, len(poly_weights)):
-            terms.append(f"{poly_weights[i]:.15g} * x{i}")
-    
-    return f"\n{' ' * 3} + ".join(terms)
+    from scipy.sparse import issparse
 
-def generate_rbf(X: np.array, y: np.array, rbf_type: RBFType, epsilon: float, poly_order: int=0, smooth: float=0.0, variable_names=None):
-    weights = fit_rbf(X, y, rbf_type, epsilon=epsilon, smooth=smooth, poly_order=poly_order)
-    equation = rbf_equation_str(weights, rbf_type, epsilon)
-    
-    # Replace variable names if custom names provided
-    if variable_names is not None:
-        for i, var_name in enumerate(variable_names):
-            equation = re.sub(rf'\bx{i+1}\b', var_name, equation)
-    
-    return equation
+    D = _distances(X_eval, weights_dict, kernel, epsilon)
+    psi = _apply(rbf_kernel_gradient_factor, D, kernel, epsilon) @ rbf_weights
+    chi = _apply(rbf_kernel_hessian_factor, D, kernel, epsilon)
+    chi = chi.multiply(rbf_weights).tocsr() if issparse(chi) else chi * rbf_weights
+
+    # sum_k chi_k (x - c_k)(x - c_k)^T = S x x^T - x s^T - s x^T + sum_k chi_k c_k c_k^T
+    S = np.asarray(chi.sum(axis=1)).ravel()
+    s = chi @ X
+    outer = (chi @ np.einsum('ki,kj->kij', X, X).reshape(len(X), d * d)).reshape(m, d, d)
+    outer += S[:, None, None] * np.einsum('mi,mj->mij', X_eval, X_eval)
+    outer -= np.einsum('mi,mj->mij', X_eval, s) + np.einsum('mi,mj->mij', s, X_eval)
+
+    return outer + psi[:, None, None] * np.eye(d)
+
+POLY_ORDERS = {'none': None, '0': 0, '1': 1}
+
+class RBFModel(Function):
+    """
+    A fitted RBF metamodel that stands in for a Function. It is evaluated from its
+    centers and weights (eval_rbf, grad_rbf) instead of an expanded expression, so
+    nothing is parsed, differentiated or compiled. In a .fnc it is a single entry
+
+        F1 = rbf(gaussian, 1.0, none, x1 x2, <data>);
+
+    (kernel, epsilon, polynomial order, input variables, then the centers, RBF
+    weights and polynomial weights as little-endian float64 hex). Other entries
+    refer to it by name like any function, e.g. O1 = F1 or INEQ1 = F1 - 10.
+    """
+    # The select_rbf_parameters result when fit() chose epsilon or smooth
+    selection: dict | None = None
+
+    def __init__(self, name: str, kernel: RBFType, epsilon: float, weights: dict, model_variables: list[str], variables: list[str]=None):
+        self.name = name.lower()
+        self.kernel = kernel
+        self.epsilon = float(epsilon)
+        self.weights = {
+            'centers': np.atleast_2d(np.asarray(weights['centers'], dtype=float)),
+            'rbf_weights': np.asarray(weights['rbf_weights'], dtype=float),
+            'poly_weights': None if weights.get('poly_weights') is None else np.asarray(weights['poly_weights'], dtype=float),
+            'sparse': weights.get('sparse'),
+        }
+        self.model_variables = [v.lower() for v in model_variables]
+        self._setup(variables or self.model_variables)
+
+        if name != "":
+            Function.registry[name] = self
+
+    def _setup(self, variables: list[str]) -> None:
+        self.constants = {}
+        self.variable_names = sorted(v.lower() for v in variables)
+
+        missing = [v for v in self.model_variables if v not in self.variable_names]
+        if missing:
+            raise ValueError(f"RBF model {self.name} uses undefined variable(s): {', '.join(missing)}")
+
+        # Columns of the formulation's (alphabetical) variables that feed the model, in model order
+        self.used_idx = [self.variable_names.index(v) for v in self.model_variables]
+        self.text = self.to_text()
+        self.cache_key = make_key(self.text, self.variable_names)
+        self.models = {self.name: self}
+
+        self._variables = None
+        self._expr = None
+        self._gradient_exprs = None
+        self._sympy_classes = None
+        self._last_gradient = (None, None)
+
+    @classmethod
+    def fit(cls, name: str, X: np.ndarray, y: np.ndarray, kernel: RBFType, epsilon: float | None=1.0, smooth: float | None=0.0, poly_order: int | None=None, variable_names: list[str]=None) -> "RBFModel":
+        weights = fit_rbf(X, y, kernel, epsilon=epsilon, smooth=smooth, poly_order=poly_order)
+        if 'selection' in weights:
+            epsilon = weights['selection']['epsilon']
+
+        model = cls(name, kernel, epsilon, weights, variable_names or [f"x{i + 1}" for i in range(np.shape(X)[1])])
+        model.selection = weights.get('selection')
+        return model
+
+    @classmethod
+    def fit_many(cls, names: list[str], X: np.ndarray, Y: np.ndarray, kernel: RBFType, epsilon: float | None=1.0, smooth: float | None=0.0, poly_order: int | None=None, variable_names: list[str]=None) -> list["RBFModel"]:
+        """
+        One model per column of Y, all from a single multi-output fit_rbf.
+        """
+        weights = fit_rbf(X, np.asarray(Y).reshape(len(X), -1), kernel, epsilon=epsilon, smooth=smooth, poly_order=poly_order)
+        if 'selection' in weights:
+            epsilon = weights['selection']['epsilon']
+
+        models = []
+        for name, output in zip(names, split_outputs(weights)):
+            model = cls(name, kernel, epsilon, output, variable_names or [f"x{i + 1}" for i in range(np.shape(X)[1])])
+            model.selection = output.get('selection')
+            models.append(model)
+
+        return models
+
+    def renamed(self, name: str, variables: list[str]=None) -> "RBFModel":
+        return RBFModel(name, self.kernel, self.epsilon, self.weights, self.model_variables, variables or self.variable_names)
+
+    ### --- Serialization ---
+    def to_text(self) -> str:
+        poly_weights = self.weights['poly_weights']
+        data = [self.weights['centers'].ravel(), self.weights['rbf_weights']]
+        if poly_weights is None:
+            poly_order = "none"
+        else:
+            poly_order = "0" if len(poly_weights) == 1 else "1"
+            data.append(poly_weights)
+
+        blob = np.concatenate(data).astype('<f8').tobytes().hex()
+        return f"rbf({self.kernel.name.lower()}, {self.epsilon!r}, {poly_order}, {' '.join(self.model_variables)}, {blob})"
+
+    @classmethod
+    def from_text(cls, name: str, text: str, variables: list[str]=None) -> "RBFModel":
+        match = re.fullmatch(r"\s*rbf\s*\((.*)\)\s*", text, flags=re.IGNORECASE | re.DOTALL)
+        fields = [f.strip() for f in match.group(1).split(',')] if match else []
+        if len(fields) != 5:
+            raise ValueError(f"Malformed RBF model '{name}': expected rbf(kernel, epsilon, polynomial order, variables, data).")
+
+        kernel, epsilon, poly_order, model_variables, blob = fields
+        try:
+            kernel = RBFType[kernel.upper()]
+            epsilon = float(epsilon)
+            poly_order = POLY_ORDERS[poly_order.lower()]
+            data = np.frombuffer(bytes.fromhex(re.sub(r"\s+", "", blob)), dtype='<f8')
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"Malformed RBF model '{name}': {e}")
+
+        model_variables = model_variables.split()
+        d = len(model_variables)
+        m = {None: 0, 0: 1, 1: d + 1}[poly_order]
+        n, extra = divmod(len(data) - m, d + 1)
+        if d == 0 or n <= 0 or extra:
+            raise ValueError(f"Malformed RBF model '{name}': data does not fit {d} variable(s).")
+
+        weights = {
+            'centers': data[:n * d].reshape(n, d),
+            'rbf_weights': data[n * d:n * (d + 1)],
+            'poly_weights': data[n * (d + 1):] if m else None,
+        }
+        return cls(name, kernel, epsilon, weights, model_variables, variables)
+
+    def __getstate__(self) -> dict:
+        return {
+            'name': self.name,
+            'kernel': self.kernel.name,
+            'epsilon': self.epsilon,
+            'weights': {k: self.weights[k] for k in ('centers', 'rbf_weights', 'poly_weights')},
+            'model_variables': self.model_variables,
+            'variables': self.variable_names,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.name = state['name']
+        self.kernel = RBFType[state['kernel']]
+        self.epsilon = state['epsilon']
+        self.weights = state['weights']
+        self.model_variables = state['model_variables']
+        self._setup(state['variables'])
+
+    ### --- Evaluation (the hooks Function.eval, value_and_grad, eval_batch and jacobian_batch use) ---
+    def _columns(self, X) -> np.ndarray:
+        return np.atleast_2d(np.asarray(X, dtype=float))[:, self.used_idx]
+
+    def fast_func(self, vals) -> float:
+        return float(eval_rbf(self._columns(vals), self.weights, self.kernel, self.epsilon)[0])
+
+    def value_and_grad_func(self, vals) -> tuple[float, np.ndarray]:
+        x = self._columns(vals)
+        value, model_gradient = value_and_grad_rbf(x, self.weights, self.kernel, self.epsilon)
+        gradient = np.zeros(len(self.variable_names))
+        gradient[self.used_idx] = model_gradient[0]
+        return float(value[0]), gradient
+
+    def batch_func(self, X) -> np.ndarray:
+        return eval_rbf(self._columns(X), self.weights, self.kernel, self.epsilon)
+
+    def gradient_batch_func(self, X) -> np.ndarray:
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        gradient = np.zeros(X.shape)
+        gradient[:, self.used_idx] = grad_rbf(X[:, self.used_idx], self.weights, self.kernel, self.epsilon)
+        return gradient
+
+    def hessian(self, vals) -> np.ndarray:
+        """
+        Hessian over all of the formulation's variables at one point.
+        """
+        hessian = np.zeros((len(self.variable_names),) * 2)
+        hessian[np.ix_(self.used_idx, self.used_idx)] = hessian_rbf(self._columns(vals), self.weights, self.kernel, self.epsilon)[0]
+        return hessian
+
+    ### --- Use inside other expressions ---
+    # A referencing Function sees the model as a sympy function call rbf_<name>(x1, x2, ...)
+    # whose partial derivatives are rbf_<name>_d1, ...; its compiled kernels call
+    # back into the model through kernel_namespace().
+    @property
+    def kernel_name(self) -> str:
+        return f"rbf_{self.name}"
+
+    def kernel_namespace(self) -> dict:
+        namespace = {self.kernel_name: self._call}
+        for i in range(len(self.model_variables)):
+            namespace[f"{self.kernel_name}_d{i + 1}"] = partial(self._call_gradient, i)
+        return namespace
+
+    @staticmethod
+    def _stack(args) -> tuple[np.ndarray, tuple]:
+        # Kernels pass one scalar or one column per model variable
+        args = np.broadcast_arrays(*[np.asarray(a, dtype=float) for a in args])
+        return np.column_stack([a.ravel() for a in args]), args[0].shape
+
+    def _call(self, *args):
+        X, shape = self._stack(args)
+        return eval_rbf(X, self.weights, self.kernel, self.epsilon).reshape(shape)[()]
+
+    def _call_gradient(self, i: int, *args):
+        # Every partial of one evaluation comes from a single grad_rbf call
+        X, shape = self._stack(args)
+        last_X, gradient = self._last_gradient
+        if last_X is None or not np.array_equal(last_X, X):
+            gradient = grad_rbf(X, self.weights, self.kernel, self.epsilon)
+            self._last_gradient = (X, gradient)
+        return gradient[:, i].reshape(shape)[()]
+
+    def _sympy_functions(self) -> list:
+        if self._sympy_classes is None:
+            from sympy import Function as SympyFunction
+
+            d = len(self.model_variables)
+            partials = [type(f"{self.kernel_name}_d{i + 1}", (SympyFunction,), {'nargs': d}) for i in range(d)]
+
+            def fdiff(call, argindex=1):
+                return partials[argindex - 1](*call.args)
+
+            self._sympy_classes = [type(self.kernel_name, (SympyFunction,), {'nargs': d, 'fdiff': fdiff}), *partials]
+        return self._sympy_classes
+
+    def bind(self, expr):
+        from sympy import Function as SympyFunction
+        for cls in self._sympy_functions():
+            expr = expr.replace(SympyFunction(cls.__name__), cls)
+        return expr
+
+    @property
+    def expr(self):
+        if self._expr is None:
+            from sympy import symbols
+            self._expr = self._sympy_functions()[0](*symbols(' '.join(self.model_variables), real=True, seq=True))
+        return self._expr
+
+    @property
+    def gradient_exprs(self):
+        if self._gradient_exprs is None:
+            self._gradient_exprs = [self.expr.diff(v) for v in self.variables]
+        return self._gradient_exprs
+
+    def __repr__(self):
+        return f"{self.name.upper()} = RBF({self.kernel.name}, {len(self.weights['centers'])} centers)"
 
 def chebyshev_nodes_1d(a: float, b: float, n: int) -> np.ndarray:
     """Generate n Chebyshev nodes in [a, b]."""
@@ -307,20 +910,17 @@ def rbf_statistics(phi: callable, variables: list, samples: int, use_sparse: boo
     dx = np.array([points[1] - points[0] if len(points) > 1 else 1.0 for points in points_1d])
     cell_volume = np.prod(dx)
 
-    # Compute statistics in one pass
-    min_val = np.inf
-    max_val = -np.inf
-    sum_val = 0.0
-    sum_sq = 0.0
-    count = 0
-
-    for x in grid_points:
-        v = phi(x)
-        min_val = min(min_val, v)
-        max_val = max(max_val, v)
-        sum_val += v
-        sum_sq += v * v
-        count += 1
+    # Compute statistics in one pass (vectorized when phi supports batches)
+    if hasattr(phi, "eval_batch"):
+        values = phi.eval_batch(grid_points)
+    else:
+        values = np.array([phi(x) for x in grid_points], dtype=float)
+
+    min_val = values.min()
+    max_val = values.max()
+    sum_val = values.sum()
+    sum_sq = np.dot(values, values)
+    count = len(values)
 
     avg = sum_val / count
     rms = np.sqrt(sum_sq / count)
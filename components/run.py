@@ -1,8 +1,17 @@
 from components.inputfnc2 import InputFile
 from components.optimize import Optimize as Opt
-from components.optimize import EvolutionType
-from multiprocessing import Queue
+from components.optimize import EvolutionType, StartStrategy
+from components.optimization_data import Optimization, Opt as OptStatus
+from components.checkpoint import Checkpoint, checkpoint_key
+from multiprocessing import Process, Queue
+from multiprocessing.synchronize import Event
+from time import perf_counter
+from pathlib import Path
 from enum import Enum
+import multiprocessing
+import atexit
+
+import numpy as np
 
 
 class METHOD(Enum):
@@ -10,16 +19,166 @@ class METHOD(Enum):
     Multi   = 1
     NSGAII  = 2
     NSGAIII = 3
+    NBI     = 4
+    Epsilon = 5
+
+class MESSAGE(Enum):
+    Progress = 0
+    Result   = 1
+
+class ProgressReporter:
+    """
+    Forwards solver progress events to the GUI queue as [MESSAGE.Progress, event],
+    at most once per interval seconds (the last event of a run is always sent).
+    Callable event values are only evaluated for events that are sent, and a 'front'
+    gets its size and, for up to 3 objectives, its hypervolume attached.
+    """
+    def __init__(self, queue: Queue, interval: float=0.25):
+        self.queue = queue
+        self.interval = interval
+        self.last = -np.inf
+        self.reference: np.ndarray = None
+
+    def __call__(self, event: dict):
+        now = perf_counter()
+        final = event.get('total') is not None and event.get('done') == event.get('total')
+        if not final and now - self.last < self.interval:
+            return
+        self.last = now
+
+        event = {key: value() if callable(value) else value for key, value in event.items()}
+        if event.get('front') is not None:
+            front = np.asarray(event['front'], dtype=float)
+            event['front'] = front.tolist()
+            event['size'] = len(front)
+            event['hypervolume'] = self.hypervolume(front)
+
+        self.queue.put([MESSAGE.Progress, event])
+
+    def hypervolume(self, front: np.ndarray) -> float | None:
+        if front.ndim != 2 or len(front) == 0 or front.shape[1] > 3:
+            return None
+
+        # The reference only ever moves outward, so the value is comparable between
+        # events for as long as the front stays inside it
+        extent = front.max(axis=0) - front.min(axis=0)
+        nadir = front.max(axis=0) + 0.1 * np.where(extent > 0, extent, np.maximum(np.abs(front.max(axis=0)), 1.0))
+        self.reference = nadir if self.reference is None else np.maximum(self.reference, nadir)
+
+        from pymoo.indicators.hv import HV
+        return float(HV(ref_point=self.reference)(front))
+
+def preload():
+    # The solver modules defer their scipy, pymoo and sympy imports; a long-lived
+    # solver process loads them while it waits so the first job does not pay for them
+    import sympy
+    import scipy.optimize, scipy.stats, scipy.special
+    import pymoo.algorithms.moo.nsga2, pymoo.algorithms.moo.nsga3, pymoo.indicators.hv
+    import components.evolution
+
+def serve(jobs: Queue, queue: Queue, stop: Event):
+    # Body of the long-lived solver process (see SolverProcess): solves every
+    # (method, file, settings, checkpoint) job and puts [MESSAGE.Result, result] on
+    # queue, after any [MESSAGE.Progress, event] messages, until it gets None. The
+    # GUI hands over an already compiled InputFile (Functions pickle as generated
+    # numpy source), so no parsing happens here; a raw .fnc string still works. A
+    # solver that raises gives a FAILED result. Setting stop makes the solver wind
+    # down and send back its partial result
+    preload()
+    while (job := jobs.get()) is not None:
+        method, file, settings, checkpoint = job
+        try:
+            res = solve(method, file, settings, ProgressReporter(queue), stop, checkpoint)
+        except Exception as e:
+            res = Optimization(OptStatus.FAILED, f"{type(e).__name__}: {e}")
+        queue.put([MESSAGE.Result, res])
+
+class SolverProcess:
+    """
+    One solver process, started ahead of time and reused for every run, so a run
+    does not wait for a fresh interpreter to import numpy, scipy, sympy and pymoo.
+    Messages arrive on queue as [MESSAGE.Progress, event] and [MESSAGE.Result,
+    Optimization] (see serve); setting stop asks the current run to wind down,
+    kill() ends it at once and starts a replacement process.
+    """
+    def __init__(self):
+        self.process: Process = None
+        self.jobs: Queue = None
+        self.queue: Queue = None
+        self.stop: Event = multiprocessing.Event()
+        # Not a daemon (its solvers may start pools of their own), so interpreter
+        # exit would otherwise wait on it
+        atexit.register(self.terminate)
+
+    def start(self):
+        # Fresh queues: a killed process may have left a half-written message behind
+        self.jobs, self.queue = Queue(), Queue()
+        self.process = Process(target=serve, args=(self.jobs, self.queue, self.stop), name="PyPROE solver")
+        self.process.start()
 
-def run(queue: Queue, method: METHOD, file: str, settings: dict):
-    file_str = file
-    file: InputFile = InputFile(file, is_file=False)
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def submit(self, method: METHOD, file: InputFile | str, settings: dict, checkpoint: str | Path=None):
+        if not self.is_alive():
+            self.start()
+        self.stop.clear()
+        self.jobs.put((method, file, settings, checkpoint))
+
+    def kill(self):
+        self.terminate()
+        self.start()
+
+    def terminate(self):
+        if self.is_alive():
+            self.process.terminate()
+            self.process.join()
+
+    def shutdown(self):
+        # Let a run that is just finishing send its result, then make sure it is gone
+        if self.is_alive():
+            self.jobs.put(None)
+            self.process.join(timeout=1)
+        self.terminate()
+
+def solve(
+    method: METHOD,
+    file: InputFile | str,
+    settings: dict,
+    progress: callable=None,
+    stop: Event=None,
+    checkpoint: str | Path=None,
+) -> Optimization:
+    """
+    Run one solver with settings as collected by the Optimization page.
+    With a checkpoint path the run saves its state there, and settings['resume']
+    continues from a checkpoint of the same problem and settings.
+    """
+    if isinstance(file, str):
+        file = InputFile(file, is_file=False)
 
     res = None
+    if checkpoint:
+        text = file.file_str if not file.is_file else Path(file.file_str).read_text()
+        checkpoint = Checkpoint(checkpoint, checkpoint_key(method.name, text, settings))
+        if not settings.get('resume'):
+            checkpoint.clear()
     ### --- SciPy ---
     match method:
         case METHOD.Single:
-            res = Opt.single(file, grid_size=settings.get('gridsize', 5), tolerance=settings.get('tolerance', 1e-6))
+            res = Opt.single(
+                file,
+                grid_size=settings.get('gridsize', 5),
+                tolerance=settings.get('tolerance', 1e-6),
+                workers=settings.get('workers', 1),
+                strategy=StartStrategy(settings.get('strategy', 0)),
+                n_starts=settings.get('starts', 100),
+                clustered=settings.get('clustered', False),
+                max_stalls=settings.get('stalls', 3),
+                progress=progress,
+                stop=stop,
+                checkpoint=checkpoint,
+            )
         case METHOD.Multi:
             res = Opt.multi(
                 input=file,
@@ -27,7 +186,31 @@ def run(queue: Queue, method: METHOD, file: str, settings: dict):
                 increment=settings.get('increment', 0.01),
                 grid_size=settings.get('gridsize', 5),
                 tolerance=settings.get('tolerance', 1e-6),
-                ftol=settings.get('ftol', 1e-6)
+                ftol=settings.get('ftol', 1e-6),
+                strategy=StartStrategy(settings.get('strategy', 0)),
+                n_starts=settings.get('starts', 100),
+                continuation=settings.get('continuation', False),
+                restart_every=settings.get('restart_every', 10),
+                workers=settings.get('workers', 1),
+                adaptive=settings.get('adaptive', False),
+                target_spacing=settings.get('target_spacing', 0.05),
+                progress=progress,
+                stop=stop,
+                checkpoint=checkpoint,
+            )
+        case METHOD.NBI | METHOD.Epsilon:
+            solver = Opt.nbi if method == METHOD.NBI else Opt.epsilon_constraint
+            res = solver(
+                file,
+                divisions=settings.get('divisions', 20),
+                grid_size=settings.get('gridsize', 5),
+                tolerance=settings.get('tolerance', 1e-6),
+                ftol=settings.get('ftol', 1e-6),
+                strategy=StartStrategy(settings.get('strategy', 0)),
+                n_starts=settings.get('starts', 100),
+                progress=progress,
+                stop=stop,
+                checkpoint=checkpoint,
             )
         case METHOD.NSGAII:
             res = Opt.evolve(
@@ -38,11 +221,14 @@ def run(queue: Queue, method: METHOD, file: str, settings: dict):
                 mutation_rate=settings.get('mutation', 0.01),
                 partitions=settings.get('partition', 100),
                 algorithm=EvolutionType.NSGAII,
+                workers=settings.get('workers', 1),
+                progress=progress,
+                stop=stop,
+                checkpoint=checkpoint,
             )
         case METHOD.NSGAIII:
             if len(file.objectives) <= 1:
-                queue.put(["Error"])
-                return
+                return Optimization(OptStatus.FAILED, "NSGAIII needs more than one objective function.")
 
             res = Opt.evolve(
                 file,
@@ -52,8 +238,12 @@ def run(queue: Queue, method: METHOD, file: str, settings: dict):
                 mutation_rate=settings.get('mutation', 0.01),
                 partitions=settings.get('partition', 100),
                 algorithm=EvolutionType.NSGAIII,
+                workers=settings.get('workers', 1),
+                progress=progress,
+                stop=stop,
+                checkpoint=checkpoint,
             )
     
     if res:
-        res.fnc = file_str
-    queue.put([res])
+        res.fnc = file
+    return res
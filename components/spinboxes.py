@@ -0,0 +1,6 @@
+from qfluentwidgets import DoubleSpinBox
+
+class NoTrailingZerosSpinBox(DoubleSpinBox):
+    def textFromValue(self, value: float) -> str:
+        # Format without trailing zeros
+        return ('{0:.10f}'.format(value)).rstrip('0').rstrip('.')
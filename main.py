@@ -1,15 +1,62 @@
-from PySide6.QtWidgets import QApplication
-from PySide6.QtGui import QIcon
-from sections.app import App
-from fixpath import app_root
+from time import perf_counter
 import multiprocessing
+import os
+import sys
+
+# Modules the application loads on first use rather than at start-up; the timing
+# report lists any that were imported anyway
+DEFERRED = ("sympy", "scipy.optimize", "scipy.stats", "scipy.spatial", "pymoo", "matplotlib")
+
+class StartupTimer:
+    """
+    Wall-clock time of each start-up phase, printed to stderr once the window has
+    been shown (python main.py --startup-timing, or PYPROE_STARTUP_TIMING=1). For a
+    per-module breakdown of the import phase use python -X importtime main.py.
+    """
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.start = self.last = perf_counter()
+        self.phases: list[tuple[str, float]] = []
+
+    def mark(self, phase: str):
+        now = perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        if not self.enabled:
+            return
+
+        self.mark("first event loop")
+        print("Startup timing:", file=sys.stderr)
+        for phase, seconds in self.phases:
+            print(f"  {phase:<18}{seconds * 1000:9.1f} ms", file=sys.stderr)
+        print(f"  {'total':<18}{(self.last - self.start) * 1000:9.1f} ms", file=sys.stderr)
+
+        loaded = [name for name in DEFERRED if name in sys.modules]
+        print(f"  deferred modules loaded: {', '.join(loaded) or 'none'}", file=sys.stderr, flush=True)
 
 if __name__ == "__main__":
     multiprocessing.freeze_support()
     multiprocessing.set_start_method('spawn')
 
+    # Imports live here so spawned solver and pool processes, which re-import this
+    # file, do not load Qt and every page
+    timer = StartupTimer("--startup-timing" in sys.argv or bool(os.environ.get("PYPROE_STARTUP_TIMING")))
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtGui import QIcon
+    from PySide6.QtCore import QTimer
+    timer.mark("import Qt")
+    from sections.app import App
+    from fixpath import app_root
+    timer.mark("import pages")
+
     app = QApplication([])
     app.setWindowIcon(QIcon((app_root() / "assets" / "logo.png").as_posix()))
+    timer.mark("QApplication")
     window = App()
+    timer.mark("build window")
     window.show()
+    timer.mark("show window")
+    QTimer.singleShot(0, timer.report)
     app.exec()
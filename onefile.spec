@@ -15,8 +15,7 @@ def collect_files_in_directory(src_dir, dest_dir):
 
 # Initialize the datas list
 datas = [
-    ('docs', 'docs'),
-    ('docs/imgs', 'docs/imgs'),
+    ('docs', 'docs'),   # help pages and their images (docs/imgs), read from disk when shown
     ('components', 'components'),
     ('sections', 'sections'),
     ('stylesheet', 'stylesheet'),
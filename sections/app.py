@@ -15,6 +15,7 @@ from sections.mainpage import MainPage
 from sections.plotting import PlottingPage, GraphIcon
 
 from components.inputfnc2 import InputFile
+from components.checkpoint import checkpoint_path
 from stylesheet.accents import ACCENT_COLORS
 
 from components.helppopup import DocumentationPopup
@@ -51,6 +52,7 @@ class App(FluentWindow):
 
         # Connect Optimization
         self.opt.start.pressed.connect(self._start_opt)
+        self.opt.resume.pressed.connect(lambda: self._start_opt(resume=True))
 
         # --- NAVIGATION ---
         self.init_navigation()
@@ -100,10 +102,7 @@ class App(FluentWindow):
         QShortcut(QKeySequence("Ctrl+2"), self, activated=lambda: self.switch_to_page(self.plotting))
 
     def _close_application(self):
-        p = self.opt.process
-        if p and p.is_alive():
-            p.terminate()
-            p.join()
+        self.opt.worker.shutdown()
 
         QApplication.instance().quit()
 
@@ -176,10 +175,12 @@ class App(FluentWindow):
             with open(saveFile.selectedFiles()[0], 'w') as file:
                 if self.stackedWidget.currentIndex() == 0:
                     file.write(self.frm.convert_to_fnc() if save_type == SaveType.FNC else self.doe.save_to_file())
+                    if save_type == SaveType.FNC:
+                        self.frm.file_path = saveFile.selectedFiles()[0]
                 else:
                     file.write(self.plotting.formpage.convert_to_fnc())
 
-    def _start_opt(self):
+    def _start_opt(self, resume: bool=False):
         fnc = self.frm.convert_to_fnc()
 
         try:
@@ -194,7 +195,7 @@ class App(FluentWindow):
             pop.exec()
             return
 
-        self.opt._solve(fnc)
+        self.opt._solve(file, checkpoint=checkpoint_path(self.frm.file_path, fnc), resume=resume)
 
     def show_documentation(self) -> None:
         try:
@@ -243,13 +243,8 @@ class DesignOfExperimentsPage(QWidget):
             pop.exec()
             return
 
-        data = []
-        for point in points:
-            data_point = [*point]
-            for fun in functions:
-                data_point.append(fun(point))
-            
-            data.append(data_point)
+        points = np.asarray(points, dtype=float)
+        data = np.column_stack([points] + [fun.eval_batch(points) for fun in functions]).tolist()
         
         headers = [var.symbol.upper() for var in variables] + [fun.name.upper() for fun in functions]
         self.table.variables = variables
@@ -23,6 +23,7 @@ class FormulationPage(QWidget):
     def __init__(self, parent=None):
         super().__init__()
         self.function_names = set()
+        self.file_path: str = None
 
         self.setObjectName("Formulation")
 
@@ -120,6 +121,8 @@ class FormulationPage(QWidget):
                 raise FileNotFoundError
             
             file = InputFile(file_path, is_file=is_file)
+            if is_file:
+                self.file_path = file_path
             
             ### VARIABLES
             for var in file.variables:
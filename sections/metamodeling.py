@@ -1,17 +1,20 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout
-from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QSizePolicy
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QAction
 
 from components.clickabletitle import ClickableTitleLabel
 from components.polyreg import PolyTypes, poly_lookup, calculate_statistics, get_Ypred
 from components.doetable import DOETable
 from components.formsections import FunctionsSection, FunctionItem, VariablesSection
-from components.rbf import RBFType, generate_rbf, rbf_statistics
+from components.rbf import RBFType, RBFModel, rbf_statistics
 from components.fnc_objects import Variable
 from components.statspopup import StatsPopup
+from components.basicpopup import BasicPopup
+from components.spinboxes import NoTrailingZerosSpinBox
 from sections.designofexperiments import make_row
 from sections.formulation import ResetIcon
 
+from concurrent.futures import ThreadPoolExecutor, Future
 from pprint import pprint as pp
 
 from qfluentwidgets import RoundMenu, ComboBox, PrimaryPushButton, ToolButton, PrimaryDropDownToolButton, SmoothScrollArea, FluentIcon as FI
@@ -61,6 +64,35 @@ class MetamodelPage(QWidget):
         options_section.addWidget(self.poly_order_row)
         options_section.addSpacing(5)
 
+        # --- Shape Parameter ---
+        self.shape_mode = ComboBox()
+        self.shape_mode.addItems(["Fixed", "Leave-One-Out"])
+        self.shape_mode.currentIndexChanged.connect(lambda index: self.epsilon_row.setVisible(index == 0))
+        self.shape_mode_row = make_row("Shape Parameter:", self.shape_mode)
+        self.shape_mode_row.setToolTip("Fixed uses the Epsilon below. Leave-One-Out chooses epsilon by minimizing the leave-one-out error of the fit (Rippa's method).")
+        options_section.addWidget(self.shape_mode_row)
+        options_section.addSpacing(5)
+
+        self.epsilon = NoTrailingZerosSpinBox()
+        self.epsilon.setDecimals(6)
+        self.epsilon.setSingleStep(0.1)
+        self.epsilon.setMinimum(1e-6)
+        self.epsilon.setMaximum(1e6)
+        self.epsilon.setValue(1.0)
+        self.epsilon.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
+        self.epsilon_row = make_row("Epsilon:", self.epsilon)
+        self.epsilon_row.setToolTip("Shape parameter of the Gaussian, multiquadric and inverse multiquadric kernels; the compactly supported kernels vanish beyond a distance of 1/epsilon.")
+        options_section.addWidget(self.epsilon_row)
+        options_section.addSpacing(5)
+
+        # --- Smoothing ---
+        self.smoothing = ComboBox()
+        self.smoothing.addItems(["None", "Leave-One-Out"])
+        self.smoothing_row = make_row("Smoothing:", self.smoothing)
+        self.smoothing_row.setToolTip("None interpolates the data exactly. Leave-One-Out adds the smoothing that minimizes the leave-one-out error, for noisy responses.")
+        options_section.addWidget(self.smoothing_row)
+        options_section.addSpacing(5)
+
         self.calculate_btn = PrimaryPushButton("Generate")
         self.calculate_btn.setCursor(Qt.PointingHandCursor)
         self.calculate_btn.clicked.connect(self.calculate)
@@ -69,6 +101,14 @@ class MetamodelPage(QWidget):
 
         options_section.addStretch()
 
+        # RBF fits (leave-one-out selection in particular) run on a worker thread so the
+        # window stays responsive; the timer picks up the models once they are ready
+        self.fit_executor = ThreadPoolExecutor(max_workers=1)
+        self.fit: Future = None
+        self.fit_variables = []
+        self.timer: QTimer = QTimer()
+        self.timer.timeout.connect(self._check_fit)
+
         self.results = QWidget()
         results_layout = QVBoxLayout(self.results)
 
@@ -113,15 +153,21 @@ class MetamodelPage(QWidget):
     
     def update_function_options(self):
         self.function_type.clear()
+        rbf_rows = [self.shape_mode_row, self.epsilon_row, self.smoothing_row]
         
         if self.method_type.currentIndex() == 0:
             self.function_type.addItems(["Linear Polynomial", "Quadratic Polynomial with No Interaction", "Quadratic Polynomial with Interaction"])
             self.poly_order_row.hide()
+            for row in rbf_rows:
+                row.hide()
         else:
             self.function_type.addItems(["Linear", "Cubic", "Thin Plate Spline", "Gaussian", "Multiquadratic", "Inversely Multiquadratic",
                                          "Compactly Supported (2,0)", "Compactly Supported (2,1)", "Compactly Supported (2,2)",
                                          "Compactly Supported (3,0)", "Compactly Supported (3,1)", "Compactly Supported (3,2)", "Compactly Supported (3,3)"])
             self.poly_order_row.show()
+            for row in rbf_rows:
+                row.show()
+            self.epsilon_row.setVisible(self.shape_mode.currentIndex() == 0)
 
     def toggle_collapse(self):
         self.showing ^= True
@@ -133,10 +179,12 @@ class MetamodelPage(QWidget):
 
         if method_type == 0:  # Polynomial Regression
             self.do_poly_reg()
+            self.remove_row_buttons()
         
-        else:                 # Radial Basis Function
+        else:                 # Radial Basis Function (rows are added once the fit finishes)
             self.do_rbf()
-        
+
+    def remove_row_buttons(self):
         # --- Remove Buttons & Update Clamp Factor ---
         for i in range(self.functions_section.row_container.count()):
             item: FunctionItem = self.functions_section.row_container.itemAt(i).widget()
@@ -201,17 +249,47 @@ class MetamodelPage(QWidget):
 
         if len(independent_vars) == 0 or len(dependent_vars) == 0:
             return
-        
-        self.current_variables = self.doe_table.variables
-        
+
+        # --- Fit Functions ---
+        # The current rows stay until the fit succeeds. None lets the fit choose the value by leave-one-out cross-validation
+        epsilon = self.epsilon.value() if self.shape_mode.currentIndex() == 0 else None
+        smooth  = 0.0 if self.smoothing.currentIndex() == 0 else None
+        names = [f"F{i + 1}" for i in range(dependent_vars.shape[1])]
+        self.fit = self.fit_executor.submit(
+            fit_rbf_models, names, independent_vars, dependent_vars, rbf, epsilon, smooth,
+            self.poly_order.currentIndex(), var_names, self.doe_table.variables,
+        )
+        self.fit_variables = self.doe_table.variables
+
+        self.option_section_widget.setEnabled(False)
+        self.calculate_btn.setText("Generating...")
+        self.timer.start(100)
+
+    def _check_fit(self):
+        if not self.fit.done():
+            return
+
+        self.timer.stop()
+        self.option_section_widget.setEnabled(True)
+        self.calculate_btn.setText("Generate")
+
+        try:
+            models, stats = self.fit.result()
+        except Exception as e:
+            pop = BasicPopup(parent=self.parent, title="ERROR", message=f"Failed to generate the RBF functions: {type(e).__name__}: {e}")
+            pop.exec()
+            return
+
+        self.current_variables = self.fit_variables
+
         # --- Clear Current Items ---
         self.functions_section.clear()
 
         # --- Populate Functions ---
-        for i in range(dependent_vars.shape[1]):
-            self.functions_section.add_row(name=f"F{i + 1}", value=generate_rbf(independent_vars, dependent_vars[:, i], rbf, epsilon=1.0, poly_order=self.poly_order.currentIndex(), variable_names=var_names))
+        # Each response becomes a native RBF model (stored as its centers and weights, not an expanded equation)
+        for i, model in enumerate(models, start=1):
+            self.functions_section.add_row(name=f"F{i}", value=model.to_text())
     
-        # --- Calcalate Statistics ---
         for i in range(self.functions_section.row_container.count()):
             item: FunctionItem = self.functions_section.row_container.itemAt(i).widget()
             btn = ToolButton(FI.FILTER)
@@ -219,13 +297,12 @@ class MetamodelPage(QWidget):
             btn.setToolTip("View Function Statistics")
             item.layout.addWidget(btn)
 
-            func = item.get_function_object(self.current_variables)
-            vars = self.current_variables
-            data = rbf_statistics(func, vars, samples=250)
-            pop = StatsPopup(function_name=f"F{i + 1}", parent=self.parent, data=data)
+            pop = StatsPopup(function_name=f"F{i + 1}", parent=self.parent, data=stats[i])
 
             btn.clicked.connect(lambda _, pop=pop: pop.exec())
 
+        self.remove_row_buttons()
+
     def send(self, send_to_opt: bool=True):
         vars = self.parent.doe.table.variables
 
@@ -238,3 +315,23 @@ class MetamodelPage(QWidget):
         for i in range(self.functions_section.row_container.count()):
             item: FunctionItem = self.functions_section.row_container.itemAt(i).widget()
             fnc_section.add_row(item.name_box.text(), item.value_box.equation_text)
+
+
+def fit_rbf_models(names, independent_vars, dependent_vars, rbf: RBFType, epsilon, smooth, poly_order: int, var_names, variables):
+    """
+    Fit the RBF models of the Metamodeling page and their statistics. Runs on the
+    page's worker thread, so it touches no widgets.
+    """
+    # All responses are fitted together, sharing one factorization of the kernel matrix
+    models = RBFModel.fit_many(names, independent_vars, dependent_vars, rbf, epsilon=epsilon, smooth=smooth, poly_order=poly_order, variable_names=var_names)
+
+    # --- Calcalate Statistics ---
+    stats = []
+    for model in models:
+        data = rbf_statistics(model, variables, samples=250)
+        data["epsilon"] = model.epsilon
+        if model.selection:
+            data.update({key: model.selection[key] for key in ("smooth", "loo_rms", "loo_points")})
+        stats.append(data)
+
+    return models, stats
@@ -4,25 +4,22 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QColor
 
-from qfluentwidgets import SpinBox, DoubleSpinBox, ComboBox, PushButton, PrimaryPushButton
-from components.run import METHOD, run
+from qfluentwidgets import SpinBox, ComboBox, PushButton, PrimaryPushButton
+from components.run import METHOD, MESSAGE, SolverProcess
+from components.optimize import default_workers, StartStrategy
 from components.optimization_data import Opt as OptStatus
 from components.optimization_data import Optimization as OptObj
+from components.inputfnc2 import InputFile
 
 from components.clickabletitle import ClickableTitleLabel
+from components.spinboxes import NoTrailingZerosSpinBox
 
 from sections.designofexperiments import make_row
 
 from components.graph import ToggleWidget
 
-from multiprocessing import Process, Queue
 import numpy as np
 
-class NoTrailingZerosSpinBox(DoubleSpinBox):
-    def textFromValue(self, value: float) -> str:
-        # Format without trailing zeros
-        return ('{0:.10f}'.format(value)).rstrip('0').rstrip('.') 
-
 class OptimizationPage(QWidget):
     def __init__(self, formpage=None):
         super().__init__()
@@ -48,7 +45,7 @@ class OptimizationPage(QWidget):
 
         # --- Solver Row ---
         self.solver = ComboBox()
-        self.solver.addItems(["SLSQP", "SLSQP + WSF", "NSGAII", "NSGAIII"])
+        self.solver.addItems(["SLSQP", "SLSQP + WSF", "NSGAII", "NSGAIII", "SLSQP + NBI", "SLSQP + ε-Constraint"])
         self.solver.currentTextChanged.connect(self._rebuild)
         self.solver.setCursor(Qt.PointingHandCursor)
         self.solver_row = make_row("Solver:", self.solver)
@@ -64,6 +61,55 @@ class OptimizationPage(QWidget):
         self.gridsize_row.setToolTip("Determines the number of equally spaced samples generated along each dimension in the grid. A higher grid size increases the number of guesses by creating a finer grid, while a lower grid size reduces the number of guesses by creating a coarser grid.")
         self.layout.addWidget(self.gridsize_row)
 
+        # --- Start Points Row ---
+        self.strategy = ComboBox()
+        self.strategy.addItems(["Grid", "Sobol", "Halton", "Latin Hypercube", "Random"])
+        self.strategy.currentTextChanged.connect(self._rebuild)
+        self.strategy.setCursor(Qt.PointingHandCursor)
+        self.strategy_row = make_row("Start Points:", self.strategy)
+        self.strategy_row.setToolTip("How the starting points for SLSQP are generated. Grid uses Grid Size points along every dimension (Grid Size ^ variables starts); the other methods use exactly the number of Starts.")
+        self.layout.addWidget(self.strategy_row)
+
+        # --- Starts Row ---
+        self.starts = SpinBox()
+        self.starts.setMinimum(1)
+        self.starts.setMaximum(1000000)
+        self.starts.setValue(100)
+        self.starts.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
+        self.starts_row = make_row("Starts:", self.starts)
+        self.starts_row.setToolTip("Total number of starting points to sample within the variable bounds.")
+        self.layout.addWidget(self.starts_row)
+
+        # --- Multistart Row ---
+        self.multistart = ComboBox()
+        self.multistart.addItems(["All Starts", "Clustered"])
+        self.multistart.currentTextChanged.connect(self._rebuild)
+        self.multistart.setCursor(Qt.PointingHandCursor)
+        self.multistart_row = make_row("Multistart:", self.multistart)
+        self.multistart_row.setToolTip("All Starts runs SLSQP from every starting point. Clustered only evaluates the starting points, launches SLSQP from promising points that are not in an already explored basin, and stops early once the best solution stops improving.")
+        self.layout.addWidget(self.multistart_row)
+
+        # --- Stall Limit Row ---
+        self.stalls = SpinBox()
+        self.stalls.setMinimum(1)
+        self.stalls.setMaximum(1000)
+        self.stalls.setValue(3)
+        self.stalls.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
+        self.stalls_row = make_row("Stall Limit:", self.stalls)
+        self.stalls_row.setToolTip("Number of consecutive batches of starting points without improvement before clustered multistart stops.")
+        self.layout.addWidget(self.stalls_row)
+
+        # --- Workers Row ---
+        self.workers = SpinBox()
+        self.workers.setMinimum(1)
+        self.workers.setMaximum(default_workers())
+        # Serial by default: a pool costs more than it saves unless function evaluations are expensive
+        self.workers.setValue(1)
+        self.workers.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
+        self.workers_row = make_row("Workers:", self.workers)
+        self.workers_row.setToolTip("Number of processes the starting points (SLSQP), weight combinations (SLSQP + WSF) or population evaluations (NSGAII/NSGAIII) are distributed across. Only worth it for expensive functions; the default of 1 solves serially.")
+        self.layout.addWidget(self.workers_row)
+
         # --- Weight Minimum ---
         self.weight_min = NoTrailingZerosSpinBox()
         self.weight_min.setDecimals(6)
@@ -88,6 +134,47 @@ class OptimizationPage(QWidget):
         self.weight_increment_row.setToolTip("Defines the adjustment interval for weights.")
         self.layout.addWidget(self.weight_increment_row)
 
+        # --- Weight Sweep Row ---
+        self.sweep = ComboBox()
+        self.sweep.addItems(["Independent", "Continuation", "Adaptive"])
+        self.sweep.currentTextChanged.connect(self._rebuild)
+        self.sweep.setCursor(Qt.PointingHandCursor)
+        self.sweep_row = make_row("Weight Sweep:", self.sweep)
+        self.sweep_row.setToolTip("Independent solves every weight combination from all starting points. Continuation walks through neighboring weights and starts each solve from the previous optimum, with periodic full restarts. Adaptive starts from the Weight Increment lattice and only adds weights where the Pareto points are further apart than the Target Spacing.")
+        self.layout.addWidget(self.sweep_row)
+
+        # --- Restart Every Row ---
+        self.restart_every = SpinBox()
+        self.restart_every.setMinimum(1)
+        self.restart_every.setMaximum(100000)
+        self.restart_every.setValue(10)
+        self.restart_every.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
+        self.restart_every_row = make_row("Restart Every:", self.restart_every)
+        self.restart_every_row.setToolTip("Number of weight combinations between full restarts from all starting points during a continuation sweep.")
+        self.layout.addWidget(self.restart_every_row)
+
+        # --- Target Spacing Row ---
+        self.target_spacing = NoTrailingZerosSpinBox()
+        self.target_spacing.setDecimals(6)
+        self.target_spacing.setSingleStep(0.01)
+        self.target_spacing.setMinimum(1e-6)
+        self.target_spacing.setMaximum(1)
+        self.target_spacing.setValue(0.05)
+        self.target_spacing.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
+        self.target_spacing_row = make_row("Target Spacing:", self.target_spacing)
+        self.target_spacing_row.setToolTip("Largest allowed distance between neighboring Pareto points, as a fraction of the front's extent in each objective.")
+        self.layout.addWidget(self.target_spacing_row)
+
+        # --- Divisions Row ---
+        self.divisions = SpinBox()
+        self.divisions.setMinimum(1)
+        self.divisions.setMaximum(10000)
+        self.divisions.setValue(20)
+        self.divisions.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
+        self.divisions_row = make_row("Divisions:", self.divisions)
+        self.divisions_row.setToolTip("Number of evenly spaced steps per objective used to place Pareto points. Each point is one SLSQP subproblem.")
+        self.layout.addWidget(self.divisions_row)
+
         # --- Iterations Row ---
         self.iterations = SpinBox()
         self.iterations.setMaximum(100000)
@@ -148,14 +235,17 @@ class OptimizationPage(QWidget):
         self.stop  = PushButton("Stop")
         self.stop.setEnabled(False)
         self.stop.pressed.connect(lambda: self._stop_solve())
+        self.resume = PushButton("Resume")
+        self.resume.setToolTip("Continue the last stopped or interrupted run of this formulation with the same settings.\nStarts from scratch if there is no matching checkpoint.")
         self.clear = PushButton("Clear")
-        for btn, name in zip([self.start, self.stop, self.clear], ["btnOptStart", "btnOptStop", "btnOptClear"]):
+        for btn, name in zip([self.start, self.stop, self.resume, self.clear], ["btnOptStart", "btnOptStop", "btnOptResume", "btnOptClear"]):
             btn.setObjectName(name)
             btn.setCursor(Qt.PointingHandCursor)
 
         self.btns_layout = QHBoxLayout()
         self.btns_layout.addWidget(self.start)
         self.btns_layout.addWidget(self.stop)
+        self.btns_layout.addWidget(self.resume)
         self.btns_layout.addWidget(self.clear)
         self.layout.addLayout(self.btns_layout)
 
@@ -175,76 +265,137 @@ class OptimizationPage(QWidget):
             main.setStretch(1, 1)
 
         ### --- Solving ---
-        self.process: Process = None
-        self.queue: Queue = Queue()
+        # Started now so the numerical stack is already imported by the first Start
+        self.worker = SolverProcess()
+        self.worker.start()
 
         self.timer: QTimer = QTimer()
         self.timer.timeout.connect(self._check_process)
 
     def _rebuild(self):
         index = self.solver.currentIndex()
-        self.gridsize_row.setVisible(index <= 1)
+        method = METHOD(index)
+        slsqp = method in (METHOD.Single, METHOD.Multi, METHOD.NBI, METHOD.Epsilon)
+        evolutionary = method in (METHOD.NSGAII, METHOD.NSGAIII)
+        is_grid = self.strategy.currentIndex() == StartStrategy.GRID.value
+        self.strategy_row.setVisible(slsqp)
+        self.gridsize_row.setVisible(slsqp and is_grid)
+        self.starts_row.setVisible(slsqp and not is_grid)
+        is_clustered = self.multistart.currentIndex() == 1
+        self.multistart_row.setVisible(index == 0)
+        self.stalls_row.setVisible(index == 0 and is_clustered)
+        self.workers_row.setVisible((index == 0 and not is_clustered) or index == 1 or evolutionary)
         self.weight_min_row.setVisible(index == 1)
         self.weight_increment_row.setVisible(index == 1)
-        self.iterations_row.setVisible(index >= 2)
+        self.sweep_row.setVisible(index == 1)
+        self.restart_every_row.setVisible(index == 1 and self.sweep.currentIndex() == 1)
+        self.target_spacing_row.setVisible(index == 1 and self.sweep.currentIndex() == 2)
+        self.divisions_row.setVisible(method in (METHOD.NBI, METHOD.Epsilon))
+        self.iterations_row.setVisible(evolutionary)
         self.population_row.setVisible(index == 2)
-        self.crossover_row.setVisible(index >= 2)
-        self.mutation_row.setVisible(index >= 2)
+        self.crossover_row.setVisible(evolutionary)
+        self.mutation_row.setVisible(evolutionary)
         self.partitions_row.setVisible(index == 3)
     
-    def _solve(self, input: str):
+    def _solve(self, input: InputFile, checkpoint: str=None, resume: bool=False):
         settings = {
             'gridsize': self.gridsize.value(),
+            'workers': self.workers.value(),
+            'strategy': self.strategy.currentIndex(),
+            'starts': self.starts.value(),
+            'clustered': self.multistart.currentIndex() == 1,
+            'stalls': self.stalls.value(),
             'min_weight': self.weight_min.value(),
             'increment': self.weight_increment.value(),
+            'continuation': self.sweep.currentIndex() == 1,
+            'restart_every': self.restart_every.value(),
+            'adaptive': self.sweep.currentIndex() == 2,
+            'target_spacing': self.target_spacing.value(),
             'generations': self.iterations.value(),
             'population': self.population.value(),
             'crossover': self.crossover.value(),
             'mutation': self.mutation.value(),
             'partitions': self.partitions.value(),
+            'divisions': self.divisions.value(),
+            'resume': resume,
         }
 
-        self.process = Process(target=run, args=(self.queue,
-                                                 METHOD(self.solver.currentIndex()),
-                                                 input,
-                                                 settings))
-        self.process.start()
+        self.worker.submit(METHOD(self.solver.currentIndex()), input, settings, checkpoint)
 
         # --- Enable Start & Stop Buttons ---
-        self.start.setEnabled(False)
-        self.stop .setEnabled(True)
+        self.start .setEnabled(False)
+        self.resume.setEnabled(False)
+        self.stop  .setEnabled(True)
 
         self.timer.start(100)
     
     def _stop_solve(self):
-        if self.process:
-            self.process.terminate()
-            self.process.join()
+        # The first press asks the solver to wind down and send what it has found;
+        # pressing again kills it without waiting for a result
+        if self.worker.is_alive() and not self.worker.stop.is_set():
+            self.worker.stop.set()
+            self.toggle.text_edit.setText("Stopping... (press Stop again to abort without results)")
+            return
+
+        self.worker.kill()
 
         self.timer.stop()
 
         self.start.setEnabled(True)
+        self.resume.setEnabled(True)
         self.stop .setEnabled(False)
 
     def _check_process(self):
-        if self.queue.empty():
-            if not self.process.is_alive():
-                # If the process has finished without sending data
-                self.timer.stop()
-                self.start.setEnabled(True)
-                self.stop.setEnabled(False)
-        else:
+        # Drain everything sent since the last tick; only the newest progress event is drawn
+        latest, result, finished = None, None, False
+        while not self.worker.queue.empty():
+            kind, data = self.worker.queue.get()
+            if kind == MESSAGE.Result:
+                result, finished = data, True
+                break
+            latest = data
+
+        if finished:
             # If the process has finished and sent a result
-            [data] = self.queue.get()
             self.timer.stop()
             self.start.setEnabled(True)
+            self.resume.setEnabled(True)
+            self.stop.setEnabled(False)
+
+            if result is not None:
+                self.handle_finish(result)
+        elif latest is not None:
+            self.handle_progress(latest)
+        elif not self.worker.is_alive():
+            # If the solver process died without sending data; have a new one ready
+            self.worker.start()
+            self.timer.stop()
+            self.start.setEnabled(True)
+            self.resume.setEnabled(True)
             self.stop.setEnabled(False)
 
-            self.handle_finish(data)
+    def handle_progress(self, event: dict):
+        status = f"Running... {event['stage']}: {event['done']}"
+        if event.get('total'):
+            status += f" / {event['total']} ({100 * event['done'] / event['total']:.0f}%)"
+        if event.get('best') is not None:
+            status += f"\nBest objective: {event['best']:.6g}"
+        if event.get('size') is not None:
+            status += f"\nFront size: {event['size']}"
+        if event.get('hypervolume') is not None:
+            status += f"\nHypervolume: {event['hypervolume']:.6g}"
+        if self.worker.stop.is_set():
+            status += "\nStopping..."
+        self.toggle.text_edit.setText(status)
+
+        if event.get('front'):
+            self.toggle.graph.plot_partial(np.array(event['front']))
     
     def handle_finish(self, opt: OptObj):
+        self.toggle.graph.remove_partial()
         if opt.status == OptStatus.FAILED:
-            self.toggle.text_edit.setText(f"ERROR: {opt.data}")
+            self.toggle.text_edit.setText(f"ERROR: {opt.error_message}")
+            self.toggle.graph.draw_idle()
             return
 
         if opt['type'] == 'single':
@@ -257,7 +408,7 @@ class OptimizationPage(QWidget):
         match opt['type']:
             case 'single':
                 self.toggle.graph.plot(np.array([opt['data'].x]))
-            case 'multi':
+            case 'multi' | 'NBI' | 'EPSILON':
                 self.toggle.graph.plot(np.array(opt['data']['points']))
             case 'NSGAII' | 'NSGAIII':
                 self.toggle.graph.plot(np.array(opt['data']['sols']))
@@ -1,23 +1,25 @@
 from PySide6.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QDialog, QLabel
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QAction
-from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 
 from components.basicpopup import BasicPopup
-from components.graph import MplWidget
+from components.graph import GraphSlot
 from components.fnc_objects import Variable, Function
 from components.inputfnc2 import InputFile
 from sections.formulation import FormulationPage
 
-from matplotlib.axes import Axes
 from qfluentwidgets import MessageBoxBase, ComboBox, SubtitleLabel, FluentIconBase, PrimaryDropDownPushButton, PushButton, RoundMenu, Theme, theme
 
 from fixpath import app_root
 
+from typing import TYPE_CHECKING
 from enum import Enum
 import numpy as np
 import re
 
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+
 def latexify(var_name: str) -> str:
     match = re.match(r"([A-Za-z]+)(\d+)", var_name)
     if match:
@@ -104,8 +106,9 @@ class PlottingPage(QWidget):
         self.form_layout.addLayout(btn_bar)
         self.main.addLayout(self.form_layout)
 
-        self.graph = MplWidget()
-        self.main.addWidget(self.graph)
+        # The graph (and matplotlib) is built when the page is first opened
+        self.graph_slot = GraphSlot()
+        self.main.addWidget(self.graph_slot)
 
         self.main.setStretch(0, 4)
         self.main.setStretch(1, 5)
@@ -174,7 +177,7 @@ class PlottingPage(QWidget):
                 pop = BasicPopup(parent=self.parent, title="ERROR", message=f"{e}")
                 pop.exec()
     
-    def get_contour_plot(self, ax: Axes, variables: list[Variable], objective: Function, equality_constraints: list[Function], inequality_constraints: list[Function]) -> None:
+    def get_contour_plot(self, ax: "Axes", variables: list[Variable], objective: Function, equality_constraints: list[Function], inequality_constraints: list[Function]) -> None:
         if len(variables) != 2:
             raise ValueError(f"Incorrect number of variables. Have {len(variables)}, need 2.")
 
@@ -186,11 +189,8 @@ class PlottingPage(QWidget):
         x2 = np.linspace(variables[1].min, variables[1].max, 101)
 
         X, Y = np.meshgrid(x1, x2)
-        Z = np.empty_like(X, dtype=float)
-
-        for i in range(X.shape[0]):
-            for j in range(X.shape[1]):
-                Z[i, j] = objective([X[i, j], Y[i, j]])
+        grid = np.column_stack([X.ravel(), Y.ravel()])
+        Z = objective.eval_batch(grid).reshape(X.shape)
 
         self.XYZ = {'X': X, 'Y': Y, 'Z': Z}
         self.plot_type = PlotType.CONTOURS
@@ -208,18 +208,14 @@ class PlottingPage(QWidget):
         # Constraints contours
         self.contour_Zs.clear()
         for fnc in equality_constraints + inequality_constraints:
-            new_Z = np.empty_like(X, dtype=float)
-
-            for i in range(X.shape[0]):
-                for j in range(X.shape[1]):
-                    new_Z[i, j] = fnc([X[i, j], Y[i, j]])
+            new_Z = fnc.eval_batch(grid).reshape(X.shape)
 
             ax.contour(X, Y, new_Z, [0], colors='k')
             self.contour_Zs.append(new_Z)
 
         self.graph.draw_idle()
     
-    def get_surface_plot(self, ax: Axes, variables: list[Variable], function: Function) -> None:
+    def get_surface_plot(self, ax: "Axes", variables: list[Variable], function: Function) -> None:
         if len(variables) != 2:
             raise ValueError(f"Incorrect number of variables. Have {len(variables)}, need 2.")
         
@@ -231,11 +227,7 @@ class PlottingPage(QWidget):
         x2 = np.linspace(variables[1].min, variables[1].max, 11)
 
         X, Y = np.meshgrid(x1, x2)
-        Z = np.empty_like(X, dtype=float)
-
-        for i in range(X.shape[0]):
-            for j in range(X.shape[1]):
-                Z[i, j] = function([X[i, j], Y[i, j]])
+        Z = function.eval_batch(np.column_stack([X.ravel(), Y.ravel()])).reshape(X.shape)
 
         self.XYZ = {'X': X, 'Y': Y, 'Z': Z}
         self.plot_type = PlotType.SURFACE
@@ -251,10 +243,17 @@ class PlottingPage(QWidget):
 
         self.graph.draw_idle()
 
+    @property
+    def graph(self):
+        return self.graph_slot.graph
+
     def popout(self):
         if any(v is None for v in self.XYZ.values()):
             return
 
+        from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+        from components.mplwidget import MplWidget
+
         dialog = QDialog()
         dialog.setWindowTitle("Optimization Results Graph")
         dialog.resize(1200, 800)